@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+# TMDB allows around 40 requests per second per IP; its old 40 per 10 seconds limit was dropped in 2019
+TMDB_RATE_LIMIT = 40
+TMDB_RATE_PERIOD = 1
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing `rate` requests per `period` seconds across coroutines"""
+
+    def __init__(self, rate, period=1.0):
+        self.rate = rate
+        self.period = period
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                # Refill proportionally to the time elapsed, capped at a full bucket
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) * self.period / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
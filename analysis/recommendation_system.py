@@ -1,37 +1,87 @@
 import pandas as pd
 import numpy as np
 import sqlite3
+import atexit
 import json
 import logging
 from datetime import datetime, timedelta
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
 import requests
-import time
-from collections import Counter, defaultdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import hashlib
+from urllib.parse import urlencode
+import aiohttp
 import os
 from dotenv import load_dotenv
+from rate_limiter import TMDB_RATE_LIMIT, TMDB_RATE_PERIOD, AsyncRateLimiter
 
 load_dotenv()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# How long cached TMDB responses stay fresh, in seconds
+GENRE_CACHE_TTL = 7 * 24 * 3600
+RECOMMENDATIONS_CACHE_TTL = 24 * 3600
+TRENDING_CACHE_TTL = 3600
+
+# The only watched-show columns the recommender reads
+WATCHED_COLUMNS = ('Title', 'TMDB_ID')
+
+# Files whose modification times decide whether recommendations need regenerating
+GENERATION_INPUTS = (
+    "data/taste_analysis.json",
+    "data/enriched_watched_shows.parquet",
+    "data/enriched_watched_shows.csv",
+    "data/final_watched_shows.csv"
+)
+
+# Settings of a generation run; part of the fingerprint so changing them regenerates
+GENERATION_CONFIG = {'limit': 50, 'pages': 1, 'seed_shows': 10}
+
 class TVRecommendationSystem:
     def __init__(self, db_path="data/tv_tracking.db"):
         self.db_path = db_path
         self.tmdb_api_key = os.getenv("TMDB_API_KEY")
         self.tmdb_base_url = "https://api.themoviedb.org/3"
+        
+        # Reuse TMDB connections and let urllib3 back off on 429s via Retry-After
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                              respect_retry_after_header=True)
+        )
+        self.http.mount("https://", adapter)
         self.taste_profile = None
         self.watched_shows = None
+        self.genre_map = None
+        self._cache_expiry = None
+        self._conn = self._connect()
+        atexit.register(self.close)
         self.init_database()
         
+    def _connect(self):
+        """Open the shared tracking database connection with write-friendly PRAGMAs"""
+        # Autocommit mode; multi-statement writes manage their own transactions
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def close(self):
+        """Close the tracking database connection"""
+        try:
+            self._conn.close()
+        except Exception as e:
+            logging.error(f"Error closing database: {e}")
+    
     def init_database(self):
         """Initialize SQLite database for tracking"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             # Create tables
             cursor.execute("""
@@ -78,8 +128,40 @@ class TVRecommendationSystem:
                 )
             """)
             
-            conn.commit()
-            conn.close()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tmdb_cache (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT,
+                    fetched_at TEXT
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS gen_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            
+            # Indexes for the watchlist, recommendation and stats queries
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+            existing_indexes = cursor.fetchone()[0]
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_rec_active_score
+                ON recommendations(watched, recommendation_score DESC)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_watchlist_active
+                ON watchlist(watched, priority DESC, added_date ASC)
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_watchlog_date ON watch_logs(watch_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_watchlog_title ON watch_logs(title)")
+            
+            # Gather planner statistics only when an index was just created, not on every start
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+            if cursor.fetchone()[0] > existing_indexes:
+                cursor.execute("ANALYZE")
+            
             logging.info("Database initialized successfully")
             
         except Exception as e:
@@ -102,11 +184,29 @@ class TVRecommendationSystem:
     def load_watched_shows(self):
         """Load watched shows data"""
         try:
-            # Try enriched data first
-            try:
-                self.watched_shows = pd.read_csv("data/enriched_watched_shows.csv")
-            except FileNotFoundError:
-                self.watched_shows = pd.read_csv("data/final_watched_shows.csv")
+            # Try enriched data first, preferring the columnar copy when it is at least as new as the CSV
+            self.watched_shows = None
+            parquet_path = "data/enriched_watched_shows.parquet"
+            csv_path = "data/enriched_watched_shows.csv"
+            if os.path.exists(parquet_path) and (
+                not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+            ):
+                try:
+                    self.watched_shows = pd.read_parquet(parquet_path, columns=list(WATCHED_COLUMNS))
+                except Exception as e:  # e.g. no parquet engine installed; the CSV has the same data
+                    logging.warning(f"Could not read {parquet_path}, falling back to CSV: {e}")
+            
+            if self.watched_shows is None:
+                csv_options = {
+                    'usecols': lambda col: col in WATCHED_COLUMNS,  # basic data has no TMDB_ID
+                    'dtype': dict.fromkeys(WATCHED_COLUMNS, str),
+                    'engine': 'c',
+                    'on_bad_lines': 'skip'
+                }
+                try:
+                    self.watched_shows = pd.read_csv(csv_path, **csv_options)
+                except FileNotFoundError:
+                    self.watched_shows = pd.read_csv("data/final_watched_shows.csv", **csv_options)
             
             logging.info(f"Loaded {len(self.watched_shows)} watched shows")
             return True
@@ -114,76 +214,165 @@ class TVRecommendationSystem:
             logging.error(f"Error loading watched shows: {e}")
             return False
     
-    def get_tmdb_recommendations(self, limit=50):
+    def _cache_key(self, url, params):
+        """Build a stable cache key for a TMDB request"""
+        return hashlib.sha1((url + urlencode(sorted(params.items()))).encode()).hexdigest()
+    
+    def _read_cache(self, key, ttl):
+        """Return a cached TMDB payload if it is younger than ttl seconds"""
+        try:
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT payload, fetched_at FROM tmdb_cache WHERE key = ?", (key,))
+            row = cursor.fetchone()
+        except Exception as e:
+            logging.error(f"Error reading TMDB cache: {e}")
+            return None
+        
+        if row:
+            expires_at = datetime.fromisoformat(row[1]) + timedelta(seconds=ttl)
+            if datetime.now() < expires_at:
+                self._note_expiry(expires_at)
+                return json.loads(row[0])
+        return None
+    
+    def _note_expiry(self, expires_at):
+        """Track the soonest expiry among the cached payloads served since the last reset"""
+        if self._cache_expiry is None or expires_at < self._cache_expiry:
+            self._cache_expiry = expires_at
+    
+    def _write_cache(self, key, payload):
+        """Store a TMDB payload in the cache"""
+        try:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                INSERT INTO tmdb_cache (key, payload, fetched_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, fetched_at = excluded.fetched_at
+            """, (key, json.dumps(payload), datetime.now().isoformat()))
+        except Exception as e:
+            logging.error(f"Error writing TMDB cache: {e}")
+    
+    def _cached_get(self, url, params, ttl):
+        """GET a TMDB endpoint, serving from the cache while it is fresh"""
+        key = self._cache_key(url, params)
+        cached = self._read_cache(key, ttl)
+        if cached is not None:
+            return cached
+        
+        response = self.http.get(url, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        self._write_cache(key, data)
+        self._note_expiry(datetime.now() + timedelta(seconds=ttl))
+        return data
+    
+    async def _fetch(self, session, limiter, url, params, ttl):
+        """Async flavour of _cached_get, paced by the shared rate limiter"""
+        key = self._cache_key(url, params)
+        cached = self._read_cache(key, ttl)
+        if cached is not None:
+            return cached
+        
+        async with limiter, session.get(url, params=params) as response:
+            response.raise_for_status()
+            data = await response.json()
+        
+        self._write_cache(key, data)
+        self._note_expiry(datetime.now() + timedelta(seconds=ttl))
+        return data
+    
+    def _recommendation_entry(self, show, reason, seed_count):
+        """Build a recommendation record from a TMDB TV result"""
+        return {
+            'tmdb_id': show['id'],
+            'title': show['name'],
+            'overview': show.get('overview', ''),
+            'vote_average': show.get('vote_average', 0),
+            'popularity': show.get('popularity', 0),
+            'first_air_date': show.get('first_air_date', ''),
+            'genre_ids': show.get('genre_ids', []),
+            'seed_count': seed_count,
+            'reasons': [reason]
+        }
+    
+    def _dedupe_page(self, results, prev_last_id):
+        """Drop the first result of a page when TMDB repeats the previous page's last result"""
+        if prev_last_id is not None and results and results[0]['id'] == prev_last_id:
+            return results[1:]
+        return results
+    
+    async def get_tmdb_recommendations(self, limit=50, pages=1, seed_shows=10):
         """Get recommendations from TMDB based on watched shows"""
         if not self.tmdb_api_key:
             logging.warning("No TMDB API key found")
             return []
         
-        recommendations = []
-        seen_shows = set()
+        # One entry per TMDB show; repeat appearances strengthen it instead of being dropped
+        agg: dict[int, dict] = {}
         
         # Get recommendations based on watched shows with TMDB IDs
+        seeds = []
         if self.watched_shows is not None and 'TMDB_ID' in self.watched_shows.columns:
-            tmdb_shows = self.watched_shows[self.watched_shows['TMDB_ID'] != 'N/A']
-            
-            for _, show in tmdb_shows.head(10).iterrows():  # Use top 10 shows for recommendations
-                try:
-                    tmdb_id = show['TMDB_ID']
-                    url = f"{self.tmdb_base_url}/tv/{tmdb_id}/recommendations"
-                    params = {"api_key": self.tmdb_api_key, "page": 1}
-                    
-                    response = requests.get(url, params=params)
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    for rec_show in data.get('results', []):
-                        show_id = rec_show['id']
-                        if show_id not in seen_shows:
-                            seen_shows.add(show_id)
-                            recommendations.append({
-                                'tmdb_id': show_id,
-                                'title': rec_show['name'],
-                                'overview': rec_show.get('overview', ''),
-                                'vote_average': rec_show.get('vote_average', 0),
-                                'popularity': rec_show.get('popularity', 0),
-                                'first_air_date': rec_show.get('first_air_date', ''),
-                                'genre_ids': rec_show.get('genre_ids', []),
-                                'reason': f"Recommended based on {show['Title']}"
-                            })
-                    
-                    time.sleep(0.25)  # Rate limiting
+            tmdb_ids = self.watched_shows['TMDB_ID']
+            tmdb_shows = self.watched_shows[tmdb_ids.notna() & (tmdb_ids != 'N/A')]
+            subset = tmdb_shows.head(seed_shows)  # Use the top shows for recommendations
+            seeds = list(zip(subset['TMDB_ID'].to_numpy(), subset['Title'].to_numpy()))
+        
+        # Let every request go out at once, up to TMDB's rate limit
+        limiter = AsyncRateLimiter(TMDB_RATE_LIMIT, TMDB_RATE_PERIOD)
+        async with aiohttp.ClientSession() as session:
+            tasks = [
+                self._fetch(session, limiter, f"{self.tmdb_base_url}/tv/{tmdb_id}/recommendations",
+                            {"api_key": self.tmdb_api_key, "page": page}, RECOMMENDATIONS_CACHE_TTL)
+                for tmdb_id, _ in seeds
+                for page in range(1, pages + 1)
+            ]
+            # Get trending shows alongside the per-show recommendations
+            tasks.append(self._fetch(session, limiter, f"{self.tmdb_base_url}/trending/tv/week",
+                                     {"api_key": self.tmdb_api_key}, TRENDING_CACHE_TTL))
+            *seed_results, trending = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for i, (_, title) in enumerate(seeds):
+            reason = f"Recommended based on {title}"
+            seen_for_seed = set()
+            prev_last_id = None
+            
+            for data in seed_results[i * pages:(i + 1) * pages]:
+                if isinstance(data, Exception):
+                    logging.error(f"Error getting recommendations for {title}: {data}")
+                    break
+                
+                results = self._dedupe_page(data.get('results', []), prev_last_id)
+                if results:
+                    prev_last_id = results[-1]['id']
+                
+                for rec_show in results:
+                    show_id = rec_show['id']
+                    if show_id in seen_for_seed:
+                        continue
+                    seen_for_seed.add(show_id)
                     
-                except Exception as e:
-                    logging.error(f"Error getting recommendations for {show.get('Title', 'Unknown')}: {e}")
-                    continue
-        
-        # Get trending shows
-        try:
-            url = f"{self.tmdb_base_url}/trending/tv/week"
-            params = {"api_key": self.tmdb_api_key}
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            for show in data.get('results', [])[:20]:  # Top 20 trending
-                show_id = show['id']
-                if show_id not in seen_shows:
-                    seen_shows.add(show_id)
-                    recommendations.append({
-                        'tmdb_id': show_id,
-                        'title': show['name'],
-                        'overview': show.get('overview', ''),
-                        'vote_average': show.get('vote_average', 0),
-                        'popularity': show.get('popularity', 0),
-                        'first_air_date': show.get('first_air_date', ''),
-                        'genre_ids': show.get('genre_ids', []),
-                        'reason': "Currently trending"
-                    })
-        
-        except Exception as e:
-            logging.error(f"Error getting trending shows: {e}")
+                    entry = agg.get(show_id)
+                    if entry is None:
+                        agg[show_id] = self._recommendation_entry(rec_show, reason, seed_count=1)
+                    else:
+                        entry['seed_count'] += 1
+                        entry['reasons'].append(reason)
+        
+        if isinstance(trending, Exception):
+            logging.error(f"Error getting trending shows: {trending}")
+        else:
+            for show in trending.get('results', [])[:20]:  # Top 20 trending
+                entry = agg.get(show['id'])
+                if entry is None:
+                    agg[show['id']] = self._recommendation_entry(show, "Currently trending", seed_count=0)
+                else:
+                    entry['reasons'].append("Currently trending")
+        
+        recommendations = list(agg.values())
+        for rec in recommendations:
+            rec['reason'] = '; '.join(rec['reasons'])
         
         return recommendations[:limit]
     
@@ -200,58 +389,71 @@ class TVRecommendationSystem:
         # Get TMDB genre mapping
         genre_map = self.get_tmdb_genre_map()
         
-        scored_recommendations = []
+        if not recommendations:
+            return recommendations
         
-        for rec in recommendations:
-            score = 0.0
+        # Pull the scoring inputs out of the dicts into parallel arrays once; float32 is
+        # plenty for TMDB's 3-significant-digit votes and popularity
+        n = len(recommendations)
+        preferred_ids = frozenset(gid for gid, name in genre_map.items() if name in preferred_genres)
+        genre_matches = np.fromiter(
+            (len(preferred_ids.intersection(rec.get('genre_ids', ()))) for rec in recommendations),
+            dtype=np.int32, count=n
+        )
+        vote_avg = np.asarray([rec.get('vote_average', 0) for rec in recommendations], dtype=np.float32)
+        popularity = np.asarray([rec.get('popularity', 0) for rec in recommendations], dtype=np.float32)
+        seed_count = np.asarray([rec.get('seed_count', 0) for rec in recommendations], dtype=np.float32)
+        # TMDB dates are ISO 'YYYY-MM-DD'; an explicit format keeps pandas on its ISO fast path
+        # instead of inferring a format, and blank or malformed dates become NaT
+        now = pd.Timestamp.now()
+        air_dates = pd.to_datetime(pd.Series([rec.get('first_air_date', '') for rec in recommendations]),
+                                   format='%Y-%m-%d', errors='coerce')
+        # NaN when the air date is unknown
+        years_old = ((now - air_dates).dt.days / 365.25).to_numpy(dtype=np.float32)
+        
+        matches_genres = genre_matches > 0
+        highly_rated = vote_avg >= 7.0
+        popular = popularity > 50  # Arbitrary threshold
+        recent = years_old <= 5  # Recent shows get bonus
+        
+        # Genre matching (40%), rating threshold (30%), popularity (20%), recency (10%), plus up to
+        # 0.25 for shows recommended from several of your watched shows; divided by the 1.25
+        # maximum so the stored and printed score stays within 0-1
+        scores = (
+            np.where(matches_genres, np.minimum(genre_matches / max(len(preferred_genres), 1), 1.0) * 0.4, 0)
+            + np.where(highly_rated, np.minimum(vote_avg / 10.0, 1.0) * 0.3, 0)
+            + np.where(popular, np.minimum(popularity / 1000, 1.0) * 0.2, 0)
+            + np.where(recent, np.maximum(0, (5 - years_old) / 5) * 0.1, 0)
+            + 0.05 * np.minimum(seed_count, 5)
+        ) / 1.25
+        
+        # Sort by score, keeping TMDB order for ties
+        scored_recommendations = []
+        for i in np.argsort(-scores, kind='stable'):
+            rec = recommendations[i]
             reasons = []
-            
-            # Genre matching (40% of score)
-            rec_genres = [genre_map.get(gid, '') for gid in rec.get('genre_ids', [])]
-            genre_matches = len(set(rec_genres) & preferred_genres)
-            if genre_matches > 0:
-                genre_score = min(genre_matches / len(preferred_genres), 1.0) * 0.4
-                score += genre_score
-                reasons.append(f"Matches {genre_matches} of your favorite genres")
-            
-            # Rating threshold (30% of score)
-            vote_avg = rec.get('vote_average', 0)
-            if vote_avg >= 7.0:
-                rating_score = min(vote_avg / 10.0, 1.0) * 0.3
-                score += rating_score
-                reasons.append(f"High rating ({vote_avg}/10)")
-            
-            # Popularity (20% of score)
-            popularity = rec.get('popularity', 0)
-            if popularity > 50:  # Arbitrary threshold
-                pop_score = min(popularity / 1000, 1.0) * 0.2
-                score += pop_score
+            if matches_genres[i]:
+                reasons.append(f"Matches {genre_matches[i]} of your favorite genres")
+            if highly_rated[i]:
+                reasons.append(f"High rating ({rec.get('vote_average', 0)}/10)")
+            if popular[i]:
                 reasons.append("Popular show")
+            if recent[i]:
+                reasons.append("Recent show")
+            if seed_count[i] > 1:
+                reasons.append(f"Recommended from {int(seed_count[i])} of your shows")
             
-            # Recency (10% of score)
-            first_air_date = rec.get('first_air_date', '')
-            if first_air_date:
-                try:
-                    air_date = datetime.strptime(first_air_date, '%Y-%m-%d')
-                    years_old = (datetime.now() - air_date).days / 365
-                    if years_old <= 5:  # Recent shows get bonus
-                        recency_score = max(0, (5 - years_old) / 5) * 0.1
-                        score += recency_score
-                        reasons.append("Recent show")
-                except:
-                    pass
-            
-            rec['recommendation_score'] = score
+            rec['recommendation_score'] = float(scores[i])
             rec['score_reasons'] = reasons
             scored_recommendations.append(rec)
         
-        # Sort by score
-        scored_recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
-        
         return scored_recommendations
     
     def get_tmdb_genre_map(self):
         """Get TMDB genre ID to name mapping"""
+        if self.genre_map is not None:
+            return self.genre_map
+        
         if not self.tmdb_api_key:
             return {}
         
@@ -259,11 +461,9 @@ class TVRecommendationSystem:
             url = f"{self.tmdb_base_url}/genre/tv/list"
             params = {"api_key": self.tmdb_api_key}
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            return {genre['id']: genre['name'] for genre in data.get('genres', [])}
+            data = self._cached_get(url, params, GENRE_CACHE_TTL)
+            self.genre_map = {genre['id']: genre['name'] for genre in data.get('genres', [])}
+            return self.genre_map
         
         except Exception as e:
             logging.error(f"Error getting genre map: {e}")
@@ -272,44 +472,48 @@ class TVRecommendationSystem:
     def save_recommendations(self, recommendations):
         """Save recommendations to database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Clear old recommendations
-            cursor.execute("DELETE FROM recommendations")
+            cursor = self._conn.cursor()
             
-            # Insert new recommendations
-            for rec in recommendations:
-                cursor.execute("""
-                    INSERT INTO recommendations 
-                    (title, tmdb_id, recommendation_score, reason, genres, vote_average, 
-                     popularity, overview, first_air_date, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            rows = [
+                (
                     rec['title'],
                     rec['tmdb_id'],
                     rec['recommendation_score'],
                     rec['reason'],
-                    ', '.join([str(gid) for gid in rec.get('genre_ids', [])]),
+                    ', '.join(map(str, rec.get('genre_ids', []))),
                     rec.get('vote_average', 0),
                     rec.get('popularity', 0),
                     rec.get('overview', ''),
                     rec.get('first_air_date', ''),
                     'Recommended'
-                ))
+                )
+                for rec in recommendations
+            ]
+            
+            # Replace old recommendations in a single transaction
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM recommendations")
+            cursor.executemany("""
+                INSERT INTO recommendations 
+                (title, tmdb_id, recommendation_score, reason, genres, vote_average, 
+                 popularity, overview, first_air_date, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            cursor.execute("COMMIT")
             
-            conn.commit()
-            conn.close()
             logging.info(f"Saved {len(recommendations)} recommendations to database")
+            return True
             
         except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.rollback()
             logging.error(f"Error saving recommendations: {e}")
+            return False
     
     def log_watch(self, title, season=None, episode=None, rating=None, review_text=None):
         """Log a watched episode/show"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             cursor.execute("""
                 INSERT INTO watch_logs 
@@ -324,8 +528,6 @@ class TVRecommendationSystem:
                 review_text
             ))
             
-            conn.commit()
-            conn.close()
             logging.info(f"Logged watch: {title} S{season}E{episode}" if season and episode else f"Logged watch: {title}")
             
         except Exception as e:
@@ -334,16 +536,13 @@ class TVRecommendationSystem:
     def add_to_watchlist(self, title, tmdb_id=None, priority=5, notes=None):
         """Add a show to watchlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             cursor.execute("""
                 INSERT INTO watchlist (title, tmdb_id, priority, notes)
                 VALUES (?, ?, ?, ?)
             """, (title, tmdb_id, priority, notes))
             
-            conn.commit()
-            conn.close()
             logging.info(f"Added {title} to watchlist")
             
         except Exception as e:
@@ -352,8 +551,7 @@ class TVRecommendationSystem:
     def get_recommendations(self, limit=20):
         """Get top recommendations from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             cursor.execute("""
                 SELECT title, recommendation_score, reason, vote_average, overview
@@ -364,7 +562,6 @@ class TVRecommendationSystem:
             """, (limit,))
             
             recommendations = cursor.fetchall()
-            conn.close()
             
             return [
                 {
@@ -384,8 +581,7 @@ class TVRecommendationSystem:
     def get_watchlist(self):
         """Get current watchlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             cursor.execute("""
                 SELECT title, priority, notes, added_date
@@ -395,7 +591,6 @@ class TVRecommendationSystem:
             """)
             
             watchlist = cursor.fetchall()
-            conn.close()
             
             return [
                 {
@@ -414,21 +609,18 @@ class TVRecommendationSystem:
     def get_watch_stats(self):
         """Get watching statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Total watches
-            cursor.execute("SELECT COUNT(*) FROM watch_logs")
-            total_watches = cursor.fetchone()[0]
+            cursor = self._conn.cursor()
             
-            # Watches this week
+            # Total watches, watches this week and average rating in one pass
             week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-            cursor.execute("SELECT COUNT(*) FROM watch_logs WHERE watch_date >= ?", (week_ago,))
-            week_watches = cursor.fetchone()[0]
-            
-            # Average rating
-            cursor.execute("SELECT AVG(rating) FROM watch_logs WHERE rating IS NOT NULL")
-            avg_rating = cursor.fetchone()[0] or 0
+            cursor.execute("""
+                SELECT COUNT(*),
+                       COALESCE(SUM(CASE WHEN watch_date >= ? THEN 1 ELSE 0 END), 0),
+                       AVG(rating)
+                FROM watch_logs
+            """, (week_ago,))
+            total_watches, week_watches, avg_rating = cursor.fetchone()
+            avg_rating = avg_rating or 0
             
             # Most watched shows
             cursor.execute("""
@@ -440,7 +632,6 @@ class TVRecommendationSystem:
             """)
             top_shows = cursor.fetchall()
             
-            conn.close()
             
             return {
                 'total_watches': total_watches,
@@ -453,8 +644,51 @@ class TVRecommendationSystem:
             logging.error(f"Error getting watch stats: {e}")
             return {}
     
-    def generate_recommendations(self):
-        """Generate and save new recommendations"""
+    def _input_fingerprint(self):
+        """Fingerprint the generation inputs by their modification times and the generation config"""
+        mtimes = [f"{path}:{os.path.getmtime(path)}" for path in GENERATION_INPUTS if os.path.exists(path)]
+        if not mtimes:
+            return ""
+        
+        config_hash = hashlib.sha1(json.dumps(GENERATION_CONFIG, sort_keys=True).encode()).hexdigest()
+        return "|".join(mtimes + [f"config:{config_hash}"])
+    
+    def _stored_fingerprint(self):
+        """Get the fingerprint recorded by the last successful generation, or None once its
+        soonest-expiring TMDB response has gone stale"""
+        try:
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT key, value FROM gen_meta WHERE key IN ('fp', 'expires_at')")
+            meta = dict(cursor.fetchall())
+        except Exception as e:
+            logging.error(f"Error reading generation metadata: {e}")
+            return None
+        
+        if 'fp' not in meta or 'expires_at' not in meta:
+            return None
+        if datetime.now() >= datetime.fromisoformat(meta['expires_at']):
+            return None
+        return meta['fp']
+    
+    def _store_fingerprint(self, fingerprint, expires_at):
+        """Record the fingerprint of a successful generation and when its TMDB data goes stale"""
+        try:
+            cursor = self._conn.cursor()
+            cursor.executemany("""
+                INSERT INTO gen_meta (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """, [('fp', fingerprint), ('expires_at', expires_at.isoformat())])
+        except Exception as e:
+            logging.error(f"Error writing generation metadata: {e}")
+    
+    def generate_recommendations(self, force=False):
+        """Generate and save new recommendations, unless the inputs, config and cached
+        TMDB data are all unchanged since the last run"""
+        fingerprint = self._input_fingerprint()
+        if not force and fingerprint and fingerprint == self._stored_fingerprint():
+            logging.info("Inputs unchanged since last run, keeping existing recommendations")
+            return True
+        
         logging.info("Generating new recommendations...")
         
         # Load required data
@@ -467,7 +701,8 @@ class TVRecommendationSystem:
             return False
         
         # Get TMDB recommendations
-        tmdb_recs = self.get_tmdb_recommendations()
+        self._cache_expiry = None
+        tmdb_recs = asyncio.run(self.get_tmdb_recommendations(**GENERATION_CONFIG))
         
         if not tmdb_recs:
             logging.warning("No TMDB recommendations found")
@@ -477,7 +712,8 @@ class TVRecommendationSystem:
         scored_recs = self.score_recommendations(tmdb_recs)
         
         # Save to database
-        self.save_recommendations(scored_recs)
+        if self.save_recommendations(scored_recs) and self._cache_expiry is not None:
+            self._store_fingerprint(fingerprint, self._cache_expiry)
         
         logging.info(f"Generated {len(scored_recs)} recommendations")
         return True
@@ -569,7 +805,7 @@ def main():
         choice = input("\nEnter your choice (1-7): ").strip()
         
         if choice == '1':
-            system.generate_recommendations()
+            system.generate_recommendations(force=True)
         
         elif choice == '2':
             limit = input("How many recommendations to show? (default 10): ").strip()
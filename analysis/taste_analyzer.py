@@ -1,23 +1,59 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
-from collections import Counter
+import os
+from collections import Counter, defaultdict
 import re
 import json
-from textblob import TextBlob
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
 import warnings
 warnings.filterwarnings('ignore')
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Review keywords: words of three or more letters
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# Columns the analysis reads; basic exports only carry a subset of them
+WATCHED_COLUMNS = {
+    'Title': str, 'Rating': str, 'Genres': str, 'Networks': str, 'Original_Language': str,
+    'Number_of_Seasons': 'Int64', 'Number_of_Episodes': 'Int64',
+    'Vote_Average': np.float64, 'Popularity': np.float64
+}
+REVIEW_COLUMNS = {'Title': str, 'Rating': str, 'Review_Text': str}
+
+# Letter grades on the 0-10 rating scale
+GRADE_MAP = {
+    'A+': 10, 'A': 9, 'A-': 8.5,
+    'B+': 8, 'B': 7, 'B-': 6.5,
+    'C+': 6, 'C': 5, 'C-': 4.5,
+    'D+': 4, 'D': 3, 'F': 1
+}
+
+def read_columns(path, columns):
+    """Read only the given columns of a CSV, with their dtypes, skipping any the file lacks"""
+    return pd.read_csv(path, usecols=lambda col: col in columns, dtype=columns, engine='c')
+
+def count_list_values(series, sort=True):
+    """Count the values in a comma-separated column, skipping missing and 'N/A' entries"""
+    values = series.dropna()
+    values = values[values != 'N/A']
+    return values.astype(str).str.split(',').explode().str.strip().value_counts(sort=sort)
+
+def top_indices(values, n):
+    """Indices of the n largest values, largest first, with ties kept in their original order"""
+    if values.size > n:
+        # Keep everything tied with the nth largest value so the cutoff does not pick arbitrarily
+        kth = np.partition(values, values.size - n)[values.size - n]
+        top = np.flatnonzero(values >= kth)
+    else:
+        top = np.arange(values.size)
+    return top[np.argsort(-values[top], kind='stable')][:n]
+
 class TVTasteAnalyzer:
     def __init__(self):
         self.watched_shows = None
@@ -30,15 +66,15 @@ class TVTasteAnalyzer:
         try:
             # Load enriched watched shows if available, otherwise use basic data
             try:
-                self.watched_shows = pd.read_csv("data/enriched_watched_shows.csv")
+                self.watched_shows = read_columns("data/enriched_watched_shows.csv", WATCHED_COLUMNS)
                 logging.info(f"Loaded {len(self.watched_shows)} enriched watched shows")
             except FileNotFoundError:
-                self.watched_shows = pd.read_csv("data/final_watched_shows.csv")
+                self.watched_shows = read_columns("data/final_watched_shows.csv", WATCHED_COLUMNS)
                 logging.info(f"Loaded {len(self.watched_shows)} basic watched shows")
             
             # Load reviews if available
             try:
-                self.reviews = pd.read_csv("data/serializd_reviews.csv")
+                self.reviews = read_columns("data/serializd_reviews.csv", REVIEW_COLUMNS)
                 logging.info(f"Loaded {len(self.reviews)} reviews")
             except FileNotFoundError:
                 logging.warning("No reviews data found")
@@ -56,28 +92,22 @@ class TVTasteAnalyzer:
             logging.warning("No genre data available for analysis")
             return {}
         
-        # Extract all genres
-        all_genres = []
-        for genres_str in self.watched_shows['Genres'].dropna():
-            if genres_str != 'N/A':
-                genres = [g.strip() for g in str(genres_str).split(',')]
-                all_genres.extend(genres)
+        # Count genre frequencies
+        genre_counts = count_list_values(self.watched_shows['Genres'])
         
-        if not all_genres:
+        if genre_counts.empty:
             logging.warning("No valid genre data found")
             return {}
         
-        # Count genre frequencies
-        genre_counts = Counter(all_genres)
         total_shows = len(self.watched_shows)
         
         # Calculate genre preferences as percentages
         genre_preferences = {
             genre: {
-                'count': count,
-                'percentage': (count / total_shows) * 100
+                'count': int(count),
+                'percentage': float(count / total_shows * 100)
             }
-            for genre, count in genre_counts.most_common()
+            for genre, count in genre_counts.items()
         }
         
         logging.info(f"Analyzed {len(genre_preferences)} genres from {total_shows} shows")
@@ -90,50 +120,45 @@ class TVTasteAnalyzer:
             return {}
         
         # Clean and convert ratings
-        ratings = []
-        for rating in self.reviews['Rating'].dropna():
-            if rating != 'N/A':
-                # Try to extract numeric rating
-                rating_str = str(rating)
-                # Look for patterns like "8.5", "4/5", "A", etc.
-                if '/' in rating_str:
-                    try:
-                        num, denom = rating_str.split('/')
-                        numeric_rating = (float(num) / float(denom)) * 10
-                        ratings.append(numeric_rating)
-                    except:
-                        pass
-                elif rating_str.replace('.', '').isdigit():
-                    try:
-                        numeric_rating = float(rating_str)
-                        # Normalize to 0-10 scale
-                        if numeric_rating <= 5:
-                            numeric_rating *= 2  # Assume 0-5 scale
-                        ratings.append(numeric_rating)
-                    except:
-                        pass
-                elif rating_str in ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'F']:
-                    # Convert letter grades to numeric
-                    grade_map = {
-                        'A+': 10, 'A': 9, 'A-': 8.5,
-                        'B+': 8, 'B': 7, 'B-': 6.5,
-                        'C+': 6, 'C': 5, 'C-': 4.5,
-                        'D+': 4, 'D': 3, 'F': 1
-                    }
-                    ratings.append(grade_map.get(rating_str, 5))
+        ratings = self.reviews['Rating'].dropna().astype(str).str.strip()
+        ratings = ratings[ratings != 'N/A']
         
-        if not ratings:
+        # Fractions like "4/5", scaled to 0-10
+        fraction = ratings.str.extract(r'^([^/]+)/([^/]+)$')
+        num = pd.to_numeric(fraction[0].str.strip(), errors='coerce')
+        denom = pd.to_numeric(fraction[1].str.strip(), errors='coerce')
+        fraction_ratings = (num / denom * 10).where(denom != 0)
+        
+        # Plain numbers like "8.5"; anything at or below 5 is assumed to be on a 0-5 scale
+        is_number = ratings.str.replace('.', '', regex=False).str.isdigit()
+        number_ratings = pd.to_numeric(ratings.where(is_number), errors='coerce')
+        number_ratings = number_ratings.where(number_ratings > 5, number_ratings * 2)
+        
+        # Letter grades
+        grade_ratings = ratings.map(GRADE_MAP)
+        
+        combined = fraction_ratings.combine_first(number_ratings).combine_first(grade_ratings)
+        ratings = combined.dropna().to_numpy()
+        
+        if ratings.size == 0:
             logging.warning("No valid rating data found")
             return {}
         
+        # Whole-number bins on the 0-10 scale; out-of-range parses like "-2/5" land in the end bins
+        rating_bins = np.clip(np.round(ratings), 0, 10).astype(np.int64)
+        
         rating_stats = {
-            'average_rating': np.mean(ratings),
-            'median_rating': np.median(ratings),
-            'std_rating': np.std(ratings),
-            'min_rating': min(ratings),
-            'max_rating': max(ratings),
+            'average_rating': float(ratings.mean()),
+            'median_rating': float(np.median(ratings)),
+            'std_rating': float(ratings.std()),
+            'min_rating': float(ratings.min()),
+            'max_rating': float(ratings.max()),
             'total_rated_shows': len(ratings),
-            'rating_distribution': Counter([round(r) for r in ratings])
+            'rating_distribution': {
+                rating: int(count)
+                for rating, count in enumerate(np.bincount(rating_bins, minlength=11))
+                if count
+            }
         }
         
         logging.info(f"Analyzed {len(ratings)} ratings with average of {rating_stats['average_rating']:.2f}")
@@ -155,10 +180,12 @@ class TVTasteAnalyzer:
             
             if len(valid_seasons) > 0:
                 characteristics['seasons'] = {
-                    'average_seasons': valid_seasons.mean(),
-                    'median_seasons': valid_seasons.median(),
-                    'prefers_long_series': valid_seasons.mean() > 3,
-                    'season_distribution': valid_seasons.value_counts().to_dict()
+                    'average_seasons': float(valid_seasons.mean()),
+                    'median_seasons': float(valid_seasons.median()),
+                    'prefers_long_series': bool(valid_seasons.mean() > 3),
+                    'season_distribution': {
+                        int(season): int(count) for season, count in valid_seasons.value_counts().items()
+                    }
                 }
         
         # Analyze show popularity and ratings
@@ -168,23 +195,20 @@ class TVTasteAnalyzer:
             
             if len(valid_ratings) > 0:
                 characteristics['tmdb_ratings'] = {
-                    'average_show_rating': valid_ratings.mean(),
-                    'prefers_highly_rated': valid_ratings.mean() > 7.0,
-                    'rating_threshold': valid_ratings.quantile(0.25)  # Bottom 25% threshold
+                    'average_show_rating': float(valid_ratings.mean()),
+                    'prefers_highly_rated': bool(valid_ratings.mean() > 7.0),
+                    'rating_threshold': float(valid_ratings.quantile(0.25))  # Bottom 25% threshold
                 }
         
         # Analyze networks/platforms
         if 'Networks' in self.watched_shows.columns:
-            networks = []
-            for network_str in self.watched_shows['Networks'].dropna():
-                if network_str != 'N/A':
-                    networks.extend([n.strip() for n in str(network_str).split(',')])
+            network_counts = count_list_values(self.watched_shows['Networks'], sort=False)
             
-            if networks:
-                network_counts = Counter(networks)
+            if not network_counts.empty:
+                top_networks = network_counts.iloc[top_indices(network_counts.to_numpy(), 10)]
                 characteristics['networks'] = {
-                    'top_networks': dict(network_counts.most_common(10)),
-                    'total_networks': len(set(networks))
+                    'top_networks': {network: int(count) for network, count in top_networks.items()},
+                    'total_networks': len(network_counts)
                 }
         
         # Analyze languages
@@ -207,51 +231,69 @@ class TVTasteAnalyzer:
         sentiments = []
         review_texts = []
         
+        # One analyzer for every review, rather than a TextBlob (and its lazy
+        # tokenizer/parser machinery) per review; repeated texts are scored once
+        from textblob.sentiments import PatternAnalyzer
+        analyzer = PatternAnalyzer()
+        scored = {}
+        
         for review_text in self.reviews['Review_Text'].dropna():
             if review_text != 'N/A' and len(str(review_text)) > 10:
                 try:
-                    blob = TextBlob(str(review_text))
-                    sentiment = blob.sentiment
+                    text = str(review_text)
+                    if text not in scored:
+                        scored[text] = analyzer.analyze(text)
+                    sentiment = scored[text]
                     sentiments.append({
                         'polarity': sentiment.polarity,  # -1 to 1
                         'subjectivity': sentiment.subjectivity  # 0 to 1
                     })
                     review_texts.append(review_text)
-                except:
+                except Exception:
                     pass
         
         if not sentiments:
             logging.warning("No valid review text for sentiment analysis")
             return {}
         
-        polarities = [s['polarity'] for s in sentiments]
-        subjectivities = [s['subjectivity'] for s in sentiments]
+        polarities = np.fromiter((s['polarity'] for s in sentiments), dtype=np.float64, count=len(sentiments))
+        subjectivities = np.fromiter((s['subjectivity'] for s in sentiments), dtype=np.float64,
+                                     count=len(sentiments))
+        positive_mask = polarities > 0.1
+        negative_mask = polarities < -0.1
+        positive_count = int(positive_mask.sum())
+        negative_count = int(negative_mask.sum())
         
         sentiment_analysis = {
-            'average_sentiment': np.mean(polarities),
-            'sentiment_std': np.std(polarities),
-            'average_subjectivity': np.mean(subjectivities),
-            'positive_reviews': len([p for p in polarities if p > 0.1]),
-            'negative_reviews': len([p for p in polarities if p < -0.1]),
-            'neutral_reviews': len([p for p in polarities if -0.1 <= p <= 0.1]),
-            'total_analyzed_reviews': len(sentiments)
+            'average_sentiment': float(polarities.mean()),
+            'sentiment_std': float(polarities.std()),
+            'average_subjectivity': float(subjectivities.mean()),
+            'positive_reviews': positive_count,
+            'negative_reviews': negative_count,
+            'neutral_reviews': polarities.size - positive_count - negative_count,
+            'total_analyzed_reviews': polarities.size
         }
         
         # Extract common words from positive vs negative reviews
-        positive_reviews = [review_texts[i] for i, p in enumerate(polarities) if p > 0.1]
-        negative_reviews = [review_texts[i] for i, p in enumerate(polarities) if p < -0.1]
-        
-        if positive_reviews and negative_reviews:
-            # Simple word frequency analysis
-            def get_common_words(texts, n=10):
-                all_words = []
-                for text in texts:
-                    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-                    all_words.extend(words)
-                return Counter(all_words).most_common(n)
+        if positive_mask.any() and negative_mask.any():
+            # Simple word frequency analysis: one sparse word-count matrix for all reviews,
+            # summed over the positive or negative rows
+            from sklearn.feature_extraction.text import CountVectorizer
+            vectorizer = CountVectorizer(token_pattern=_WORD_RE.pattern, lowercase=True)
+            try:
+                word_counts = vectorizer.fit_transform(review_texts)
+            except ValueError:  # No words of three or more letters at all
+                word_counts = None
             
-            sentiment_analysis['positive_keywords'] = dict(get_common_words(positive_reviews))
-            sentiment_analysis['negative_keywords'] = dict(get_common_words(negative_reviews))
+            if word_counts is not None:
+                vocabulary = vectorizer.get_feature_names_out()
+                
+                def get_common_words(mask, n=10):
+                    counts = np.asarray(word_counts[mask].sum(axis=0)).ravel()
+                    return {vocabulary[i]: int(counts[i]) for i in top_indices(counts, n) if counts[i] > 0}
+                
+                sentiment_analysis['positive_keywords'] = get_common_words(positive_mask)
+                sentiment_analysis['negative_keywords'] = get_common_words(negative_mask)
         
         logging.info(f"Analyzed sentiment for {len(sentiments)} reviews")
         return sentiment_analysis
@@ -262,60 +304,73 @@ class TVTasteAnalyzer:
             logging.warning("Cannot cluster shows without genre data")
             return {}
         
-        # Prepare features for clustering
-        features_df = pd.DataFrame()
-        
-        # Genre features (one-hot encoding)
-        all_genres = set()
-        for genres_str in self.watched_shows['Genres'].dropna():
-            if genres_str != 'N/A':
-                genres = [g.strip() for g in str(genres_str).split(',')]
-                all_genres.update(genres)
-        
-        # Create genre columns
-        for genre in all_genres:
-            features_df[f'genre_{genre}'] = self.watched_shows['Genres'].apply(
-                lambda x: 1 if isinstance(x, str) and genre in x else 0
-            )
+        # Genre features (one-hot encoding on whole genre names, so "Drama" does not match "Crime Drama")
+        genres = self.watched_shows['Genres']
+        genres = genres.where(genres != 'N/A').fillna('').astype(str)
+        genre_dummies = genres.str.get_dummies(sep=',')
+        # Merge columns that only differed by the whitespace around the separator
+        genre_dummies.columns = genre_dummies.columns.str.strip()
+        genre_dummies = genre_dummies.T.groupby(level=0).max().T
+        genre_dummies = genre_dummies.drop(columns='', errors='ignore').add_prefix('genre_').astype(np.int8)
         
         # Add numeric features if available
         numeric_features = ['Vote_Average', 'Popularity', 'Number_of_Seasons', 'Number_of_Episodes']
-        for feature in numeric_features:
-            if feature in self.watched_shows.columns:
-                values = pd.to_numeric(self.watched_shows[feature], errors='coerce').fillna(0)
-                features_df[feature] = values
+        numeric_df = pd.DataFrame({
+            feature: pd.to_numeric(self.watched_shows[feature], errors='coerce').fillna(0)
+            for feature in numeric_features
+            if feature in self.watched_shows.columns
+        }, index=self.watched_shows.index)
+        
+        # Prepare features for clustering
+        features_df = pd.concat([genre_dummies, numeric_df], axis=1)
         
         if features_df.empty:
             logging.warning("No features available for clustering")
             return {}
         
-        # Standardize features
-        scaler = StandardScaler()
-        features_scaled = scaler.fit_transform(features_df)
+        # Standardize features (zero mean, unit variance; constant columns are left centred)
+        features_scaled = features_df.to_numpy(dtype=np.float32)
+        features_scaled -= features_scaled.mean(axis=0, keepdims=True, dtype=np.float32)
+        feature_std = features_scaled.std(axis=0, keepdims=True, dtype=np.float32)
+        feature_std[feature_std == 0] = 1.0
+        features_scaled /= feature_std
         
         # Perform clustering
         n_clusters = min(5, len(self.watched_shows) // 10)  # Reasonable number of clusters
         if n_clusters < 2:
             n_clusters = 2
         
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        from sklearn.cluster import KMeans
+        kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
         clusters = kmeans.fit_predict(features_scaled)
         
+        # Count genres per cluster in a single pass over the shows
+        cluster_genres = defaultdict(Counter)
+        for cluster, genres_str in zip(clusters, genres.tolist()):
+            if genres_str:
+                cluster_genres[cluster].update(g.strip() for g in genres_str.split(','))
+        titles = self.watched_shows['Title'].to_numpy()
+        cluster_sizes = np.bincount(clusters, minlength=n_clusters)
+        
+        # Mean TMDB rating per cluster, skipping shows without one
+        cluster_ratings = np.zeros(n_clusters)
+        if 'Vote_Average' in self.watched_shows.columns:
+            vote_average = pd.to_numeric(self.watched_shows['Vote_Average'], errors='coerce')
+            vote_average = vote_average.to_numpy(dtype=np.float64)
+            rated = ~np.isnan(vote_average)
+            rating_sums = np.bincount(clusters, weights=np.where(rated, vote_average, 0),
+                                      minlength=n_clusters)
+            rating_counts = np.bincount(clusters, weights=rated, minlength=n_clusters)
+            np.divide(rating_sums, rating_counts, out=cluster_ratings, where=rating_counts > 0)
+        
         # Analyze clusters
         cluster_analysis = {}
         for i in range(n_clusters):
-            cluster_shows = self.watched_shows[clusters == i]
-            cluster_genres = []
-            
-            for genres_str in cluster_shows['Genres'].dropna():
-                if genres_str != 'N/A':
-                    cluster_genres.extend([g.strip() for g in str(genres_str).split(',')])
-            
             cluster_analysis[f'cluster_{i}'] = {
-                'size': len(cluster_shows),
-                'shows': cluster_shows['Title'].tolist()[:10],  # First 10 shows
-                'top_genres': dict(Counter(cluster_genres).most_common(5)),
-                'avg_rating': cluster_shows.get('Vote_Average', pd.Series([0])).mean() if 'Vote_Average' in cluster_shows.columns else 0
+                'size': int(cluster_sizes[i]),
+                'shows': titles[clusters == i][:10].tolist(),  # First 10 shows
+                'top_genres': dict(cluster_genres[i].most_common(5)),
+                'avg_rating': float(cluster_ratings[i])
             }
         
         logging.info(f"Created {n_clusters} clusters from {len(self.watched_shows)} shows")
@@ -400,15 +455,29 @@ class TVTasteAnalyzer:
     def save_analysis(self, filename="data/taste_analysis.json"):
         """Save the complete analysis to a JSON file"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.taste_profile, f, indent=2, ensure_ascii=False, default=str)
+            if orjson is not None:
+                options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(self.taste_profile, option=options, default=str))
+            else:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(self.taste_profile, f, indent=2, ensure_ascii=False, default=str)
             logging.info(f"Taste analysis saved to {filename}")
         except Exception as e:
             logging.error(f"Error saving analysis: {e}")
     
     def create_visualizations(self):
         """Create visualizations of the taste analysis"""
+        if os.environ.get('SKIP_VIZ'):
+            logging.info("SKIP_VIZ is set, skipping visualizations")
+            return
+        
         try:
+            # Heavy plotting imports are only paid for when a chart is drawn
+            import matplotlib
+            matplotlib.use('Agg')  # Charts are only ever written to files
+            import matplotlib.pyplot as plt
+            
             plt.style.use('default')
             fig, axes = plt.subplots(2, 2, figsize=(15, 12))
             fig.suptitle('Your TV Taste Analysis', fontsize=16, fontweight='bold')
@@ -460,7 +529,8 @@ class TVTasteAnalyzer:
                 axes[1, 1].set_ylabel('Number of Reviews')
             
             plt.tight_layout()
-            plt.savefig('debug_output/taste_analysis_visualization.png', dpi=300, bbox_inches='tight')
+            plt.savefig('debug_output/taste_analysis_visualization.png', dpi=150, bbox_inches='tight',
+                        pil_kwargs={'optimize': True})
             plt.close()
             
             logging.info("Visualizations saved to debug_output/taste_analysis_visualization.png")
@@ -1,10 +1,24 @@
 import pandas as pd
-import requests
-import time
+import argparse
+import asyncio
+import aiohttp
+import atexit
+import csv
+import hashlib
+import sqlite3
 import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 import os
 import json
+try:
+    import orjson
+except ImportError:  # Optional; fall back to pandas' JSON writer
+    orjson = None
+from rate_limiter import TMDB_RATE_LIMIT, TMDB_RATE_PERIOD, AsyncRateLimiter
 
 load_dotenv()
 
@@ -12,10 +26,161 @@ load_dotenv()
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")  # Add this to your .env file
 TMDB_BASE_URL = "https://api.themoviedb.org/3"
 
+# Keep at most this many shows in flight at once; requests are paced by TMDB_RATE_LIMIT
+TMDB_CONCURRENCY = 20
+
+# Responses worth retrying, with exponential backoff unless TMDB sends Retry-After
+TMDB_RETRY_STATUSES = {429, 500, 502, 503, 504}
+TMDB_MAX_RETRIES = 5
+TMDB_BACKOFF_FACTOR = 0.3
+
+# On-disk cache of TMDB responses; show metadata barely changes, so re-runs only fetch new shows
+TMDB_CACHE_PATH = "data/tmdb_cache.sqlite"
+TMDB_CACHE_TTL = 7 * 24 * 3600  # seconds
+
+# Finished records per (title, year); stale ones are served at once and refreshed in the background
+ENRICHED_CACHE_TTL = 30 * 24 * 3600  # seconds
+
+# --refresh ignores anything cached before this run and fetches it again; entries written during
+# the run are still shared, so the reviews pass reuses what the watched shows pass just fetched
+REFRESH = False
+RUN_STARTED = datetime.now()
+
+_cache_conn = None
+
+# Crew roles worth keeping in the enriched data
+CREW_JOBS = {"Director", "Producer", "Executive Producer"}
+
+# Empty TMDB fields for shows that could not be matched (read-only, shared by every row)
+EMPTY_TMDB_FIELDS = MappingProxyType({
+    "TMDB_ID": "N/A", "TMDB_Title": "N/A", "Original_Title": "N/A",
+    "Genres": "N/A", "Overview": "N/A", "First_Air_Date": "N/A",
+    "Last_Air_Date": "N/A", "Status": "N/A", "Number_of_Seasons": 0,
+    "Number_of_Episodes": 0, "Episode_Runtime": "N/A", "Average_Runtime": 0,
+    "Networks": "N/A", "Production_Countries": "N/A", "Languages": "N/A",
+    "Original_Language": "N/A", "Popularity": 0, "Vote_Average": 0,
+    "Vote_Count": 0, "Adult": False, "Homepage": "N/A", "IMDB_ID": "N/A",
+    "Created_By": "N/A", "Keywords": "N/A", "Cast": "N/A", "Crew": "N/A"
+})
+EMPTY_REVIEW_TMDB_FIELDS = MappingProxyType({
+    "TMDB_ID": "N/A", "TMDB_Title": "N/A", "Genres": "N/A",
+    "Vote_Average": 0, "Popularity": 0, "Number_of_Seasons": 0,
+    "Number_of_Episodes": 0, "Status": "N/A", "Networks": "N/A"
+})
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def search_show_on_tmdb(title, year=None):
+def get_cache():
+    """Open the TMDB response cache, once per process"""
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(TMDB_CACHE_PATH, isolation_level=None)
+        _cache_conn.execute("PRAGMA journal_mode=WAL")
+        _cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS tmdb_responses (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        _cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS enriched_shows (
+                norm_title TEXT NOT NULL,
+                year INTEGER NOT NULL,  -- 0 when the title carries no year
+                data TEXT NOT NULL,
+                tmdb_synced_at TEXT NOT NULL,
+                PRIMARY KEY (norm_title, year)
+            )
+        """)
+        atexit.register(_cache_conn.close)
+    return _cache_conn
+
+def cache_key(url, params):
+    """Build a cache key for a TMDB request, namespaced by endpoint type ("search", "tv")"""
+    namespace = url[len(TMDB_BASE_URL):].strip("/").split("/")[0]
+    query = urlencode(sorted((k, v) for k, v in params.items() if k != "api_key"))
+    return f"{namespace}:{hashlib.sha1((url + query).encode()).hexdigest()}"
+
+def read_cache(key):
+    """Return a cached TMDB payload if it is younger than TMDB_CACHE_TTL"""
+    try:
+        row = get_cache().execute(
+            "SELECT payload, fetched_at FROM tmdb_responses WHERE key = ?", (key,)
+        ).fetchone()
+    except Exception as e:
+        logging.error(f"Error reading TMDB cache: {e}")
+        return None
+    
+    if not row:
+        return None
+    fetched_at = datetime.fromisoformat(row[1])
+    if REFRESH and fetched_at < RUN_STARTED:
+        return None
+    if datetime.now() - fetched_at < timedelta(seconds=TMDB_CACHE_TTL):
+        return json.loads(row[0])
+    return None
+
+def write_cache(key, payload):
+    """Store a TMDB payload in the cache"""
+    try:
+        get_cache().execute("""
+            INSERT INTO tmdb_responses (key, payload, fetched_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, fetched_at = excluded.fetched_at
+        """, (key, json.dumps(payload), datetime.now().isoformat()))
+    except Exception as e:
+        logging.error(f"Error writing TMDB cache: {e}")
+
+def read_enriched(title, year):
+    """Return (record, is_fresh) for a previously enriched show, or (None, False)"""
+    try:
+        row = get_cache().execute(
+            "SELECT data, tmdb_synced_at FROM enriched_shows WHERE norm_title = ? AND year = ?",
+            (title.strip().lower(), year or 0)
+        ).fetchone()
+    except Exception as e:
+        logging.error(f"Error reading enriched show cache: {e}")
+        return None, False
+    
+    if not row:
+        return None, False
+    synced_at = datetime.fromisoformat(row[1])
+    if REFRESH and synced_at < RUN_STARTED:
+        return None, False
+    return json.loads(row[0]), datetime.now() - synced_at < timedelta(seconds=ENRICHED_CACHE_TTL)
+
+def write_enriched(title, year, data):
+    """Store an enriched show record"""
+    try:
+        get_cache().execute("""
+            INSERT OR REPLACE INTO enriched_shows (norm_title, year, data, tmdb_synced_at)
+            VALUES (?, ?, ?, ?)
+        """, (title.strip().lower(), year or 0, json.dumps(data), datetime.now().isoformat()))
+    except Exception as e:
+        logging.error(f"Error writing enriched show cache: {e}")
+
+async def tmdb_get(session, limiter, url, params):
+    """GET a TMDB endpoint, paced by the shared rate limiter and retried on throttling/server errors"""
+    key = cache_key(url, params)
+    cached = read_cache(key)
+    if cached is not None:
+        return cached
+    
+    for attempt in range(TMDB_MAX_RETRIES + 1):
+        async with limiter, session.get(url, params=params) as response:
+            if response.status not in TMDB_RETRY_STATUSES or attempt == TMDB_MAX_RETRIES:
+                response.raise_for_status()
+                data = await response.json()
+                write_cache(key, data)
+                return data
+            
+            retry_after = response.headers.get("Retry-After", "")
+            delay = int(retry_after) if retry_after.isdigit() else TMDB_BACKOFF_FACTOR * 2 ** attempt
+        
+        await asyncio.sleep(delay)
+
+async def search_show_on_tmdb(session, limiter, title, year=None):
     """Search for a TV show on TMDB"""
     try:
         # Clean the title for better search results
@@ -31,10 +196,7 @@ def search_show_on_tmdb(title, year=None):
         if year:
             params["first_air_date_year"] = year
             
-        response = requests.get(search_url, params=params)
-        response.raise_for_status()
-        
-        search_results = response.json()
+        search_results = await tmdb_get(session, limiter, search_url, params)
         
         if not search_results.get("results"):
             return None
@@ -46,7 +208,7 @@ def search_show_on_tmdb(title, year=None):
         logging.error(f"Error searching for {title}: {e}")
         return None
 
-def get_show_details(tmdb_id):
+async def get_show_details(session, limiter, tmdb_id):
     """Get detailed information about a TV show"""
     try:
         details_url = f"{TMDB_BASE_URL}/tv/{tmdb_id}"
@@ -55,46 +217,49 @@ def get_show_details(tmdb_id):
             "append_to_response": "credits,keywords,external_ids"
         }
         
-        response = requests.get(details_url, params=params)
-        response.raise_for_status()
-        
-        return response.json()
+        return await tmdb_get(session, limiter, details_url, params)
         
     except Exception as e:
         logging.error(f"Error getting details for TMDB ID {tmdb_id}: {e}")
         return None
 
-def enrich_show_data(title, year=None):
+async def enrich_show_data(session, limiter, title, year=None):
     """Get comprehensive data for a show"""
     try:
         # Search for the show
-        search_result = search_show_on_tmdb(title, year)
+        search_result = await search_show_on_tmdb(session, limiter, title, year)
         if not search_result:
             return None
             
         tmdb_id = search_result["id"]
         
         # Get detailed information
-        details = get_show_details(tmdb_id)
+        details = await get_show_details(session, limiter, tmdb_id)
         if not details:
             return None
             
+        # Nested sections used more than once
+        runtimes = details.get("episode_run_time", [])
+        credit_info = details.get("credits", {})
+        
         # Extract relevant information
         enriched_data = {
             "TMDB_ID": tmdb_id,
             "TMDB_Title": details.get("name", "N/A"),
             "Original_Title": details.get("original_name", "N/A"),
-            "Genres": ", ".join([genre["name"] for genre in details.get("genres", [])]),
+            "Genres": ", ".join(genre["name"] for genre in details.get("genres", [])),
             "Overview": details.get("overview", "N/A"),
             "First_Air_Date": details.get("first_air_date", "N/A"),
             "Last_Air_Date": details.get("last_air_date", "N/A"),
             "Status": details.get("status", "N/A"),
             "Number_of_Seasons": details.get("number_of_seasons", 0),
             "Number_of_Episodes": details.get("number_of_episodes", 0),
-            "Episode_Runtime": details.get("episode_run_time", []),
-            "Average_Runtime": sum(details.get("episode_run_time", [])) / len(details.get("episode_run_time", [])) if details.get("episode_run_time") else 0,
-            "Networks": ", ".join([network["name"] for network in details.get("networks", [])]),
-            "Production_Countries": ", ".join([country["name"] for country in details.get("production_countries", [])]),
+            "Episode_Runtime": runtimes,
+            "Average_Runtime": sum(runtimes) / len(runtimes) if runtimes else 0,
+            "Networks": ", ".join(network["name"] for network in details.get("networks", [])),
+            "Production_Countries": ", ".join(
+                country["name"] for country in details.get("production_countries", [])
+            ),
             "Languages": ", ".join(details.get("languages", [])),
             "Original_Language": details.get("original_language", "N/A"),
             "Popularity": details.get("popularity", 0),
@@ -103,10 +268,15 @@ def enrich_show_data(title, year=None):
             "Adult": details.get("adult", False),
             "Homepage": details.get("homepage", "N/A"),
             "IMDB_ID": details.get("external_ids", {}).get("imdb_id", "N/A"),
-            "Created_By": ", ".join([creator["name"] for creator in details.get("created_by", [])]),
-            "Keywords": ", ".join([keyword["name"] for keyword in details.get("keywords", {}).get("results", [])]),
-            "Cast": ", ".join([actor["name"] for actor in details.get("credits", {}).get("cast", [])[:10]]),  # Top 10 cast members
-            "Crew": ", ".join([crew["name"] for crew in details.get("credits", {}).get("crew", []) if crew["job"] in ["Director", "Producer", "Executive Producer"]][:5])
+            "Created_By": ", ".join(creator["name"] for creator in details.get("created_by", [])),
+            "Keywords": ", ".join(
+                keyword["name"] for keyword in details.get("keywords", {}).get("results", [])
+            ),
+            # Top 10 cast members
+            "Cast": ", ".join(actor["name"] for actor in credit_info.get("cast", [])[:10]),
+            "Crew": ", ".join([
+                crew["name"] for crew in credit_info.get("crew", []) if crew["job"] in CREW_JOBS
+            ][:5])
         }
         
         return enriched_data
@@ -115,6 +285,80 @@ def enrich_show_data(title, year=None):
         logging.error(f"Error enriching data for {title}: {e}")
         return None
 
+def save_parquet(df, path):
+    """Save df as zstd-compressed Parquet, storing mixed-type text columns as strings like the CSV"""
+    try:
+        parquet_df = df.copy()
+        for col in parquet_df.select_dtypes(include="object").columns:
+            parquet_df[col] = parquet_df[col].astype(str).where(parquet_df[col].notna())
+        parquet_df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+        return True
+    except ImportError:
+        logging.warning(f"pyarrow is not installed, skipping {path}")
+    except Exception as e:
+        logging.error(f"Error saving {path}: {e}")
+    return False
+
+def save_json(df, path):
+    """Save df as an indented JSON array of records, with orjson when it is installed"""
+    if orjson is None:
+        df.to_json(path, orient="records", indent=2)
+        return
+    
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(df.to_dict("records"), option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+
+async def enrich_shows(queries, on_progress=None):
+    """Enrich (title, year) pairs concurrently into {position: TMDB data or None}, reporting to on_progress"""
+    results = {}
+    limiter = AsyncRateLimiter(TMDB_RATE_LIMIT, TMDB_RATE_PERIOD)
+    semaphore = asyncio.Semaphore(TMDB_CONCURRENCY)
+    # One pooled keep-alive session for every request, so connections and TLS are reused
+    connector = aiohttp.TCPConnector(limit=TMDB_CONCURRENCY, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def fetch(title, year):
+            async with semaphore:
+                tmdb_data = await enrich_show_data(session, limiter, title, year)
+            if tmdb_data:
+                write_enriched(title, year, tmdb_data)
+            return tmdb_data
+        
+        async def enrich(position, title, year):
+            return position, await fetch(title, year)
+        
+        # Serve previously enriched shows straight away, refreshing stale ones alongside the new lookups
+        tasks = []
+        refreshes = []
+        for position, (title, year) in enumerate(queries):
+            cached, is_fresh = read_enriched(title, year)
+            if cached is None:
+                tasks.append(enrich(position, title, year))
+                continue
+            
+            results[position] = cached
+            if on_progress:
+                on_progress(position, cached)
+            if not is_fresh:
+                refreshes.append(asyncio.create_task(fetch(title, year)))
+        
+        if results:
+            logging.info(f"{len(results)} shows served from the enrichment cache "
+                         f"({len(refreshes)} stale, refreshing)")
+        
+        for task in asyncio.as_completed(tasks):
+            position, tmdb_data = await task
+            results[position] = tmdb_data
+            logging.info(f"Processed {len(results)}/{len(queries)}: {queries[position][0]}")
+            
+            if on_progress:
+                on_progress(position, tmdb_data)
+        
+        await asyncio.gather(*refreshes)
+    
+    return results
+
 def enrich_watched_shows():
     """Enrich the watched shows data with TMDB information"""
     
@@ -132,60 +376,76 @@ def enrich_watched_shows():
         logging.error("data/final_watched_shows.csv not found! Please run the scraper first.")
         return
     
-    enriched_data = []
-    failed_shows = []
+    # Try to extract year from title if present, e.g. "Shogun (2024)"
+    titles = watched_df["Title"].astype(str)
+    years = titles.str.extract(r"\((\d{4})\)[^(]*$")[0]
+    # Remove year from title for search
+    search_titles = titles.str.split("(", n=1).str[0].str.strip().where(years.notna(), titles)
+    queries = [
+        (title, int(year) if pd.notna(year) else None)
+        for title, year in zip(search_titles, years)
+    ]
     
-    for index, row in watched_df.iterrows():
-        title = row["Title"]
-        logging.info(f"Processing {int(index) + 1}/{len(watched_df)}: {title}")
+    rows = watched_df.to_dict("records")
+    
+    def combine(row, tmdb_data):
+        """Combine original data with TMDB data, keeping the original data if the lookup failed"""
+        enriched_row = dict(row)
+        if tmdb_data:
+            enriched_row.update(tmdb_data)
+        else:
+            # Add empty TMDB fields
+            enriched_row.update(EMPTY_TMDB_FIELDS)
+        return enriched_row
+    
+    # Look each distinct (title, year) up once, however many rows share it
+    unique_queries = list(dict.fromkeys(queries))
+    if len(unique_queries) < len(queries):
+        logging.info(f"{len(queries) - len(unique_queries)} duplicate shows will reuse earlier lookups")
+    
+    rows_by_query = defaultdict(list)
+    for row, query in zip(rows, queries):
+        rows_by_query[query].append(row)
+    
+    # Stream every enriched row to the progress file as its lookup completes
+    with open("data/enriched_shows_progress.csv", "w", newline="", encoding="utf-8") as progress_file:
+        progress_writer = None
+        processed = 0
         
-        # Try to extract year from title if present
-        year = None
-        if "(" in title and ")" in title:
-            try:
-                year_match = title.split("(")[-1].split(")")[0]
-                if year_match.isdigit() and len(year_match) == 4:
-                    year = int(year_match)
-                    title = title.split("(")[0].strip()  # Remove year from title for search
-            except:
-                pass
+        def save_progress(position, tmdb_data):
+            nonlocal progress_writer, processed
+            for row in rows_by_query[unique_queries[position]]:
+                # Write missing values as empty cells, like DataFrame.to_csv (NaN is the only value != itself)
+                enriched_row = {k: v if v == v else "" for k, v in combine(row, tmdb_data).items()}
+                if progress_writer is None:
+                    progress_writer = csv.DictWriter(progress_file, fieldnames=list(enriched_row))
+                    progress_writer.writeheader()
+                progress_writer.writerow(enriched_row)
+            
+            # Flush progress to disk every 50 shows
+            processed += 1
+            if processed % 50 == 0:
+                progress_file.flush()
+                os.fsync(progress_file.fileno())
+                logging.info(f"Progress saved: {processed} shows processed")
         
-        # Get TMDB data
-        tmdb_data = enrich_show_data(title, year)
+        # Get TMDB data for every show at once, paced by the rate limiter
+        tmdb_results = asyncio.run(enrich_shows(unique_queries, on_progress=save_progress))
+    tmdb_by_query = {unique_queries[i]: tmdb_data for i, tmdb_data in tmdb_results.items()}
+    
+    enriched_data = []
+    failed_shows = []
+    
+    for row, query in zip(rows, queries):
+        title = query[0]
+        tmdb_data = tmdb_by_query[query]
+        enriched_data.append(combine(row, tmdb_data))
         
         if tmdb_data:
-            # Combine original data with TMDB data
-            enriched_row = row.to_dict()
-            enriched_row.update(tmdb_data)
-            enriched_data.append(enriched_row)
             logging.info(f"✓ Successfully enriched: {title}")
         else:
-            # Keep original data even if TMDB lookup failed
-            enriched_row = row.to_dict()
-            # Add empty TMDB fields
-            tmdb_fields = {
-                "TMDB_ID": "N/A", "TMDB_Title": "N/A", "Original_Title": "N/A",
-                "Genres": "N/A", "Overview": "N/A", "First_Air_Date": "N/A",
-                "Last_Air_Date": "N/A", "Status": "N/A", "Number_of_Seasons": 0,
-                "Number_of_Episodes": 0, "Episode_Runtime": "N/A", "Average_Runtime": 0,
-                "Networks": "N/A", "Production_Countries": "N/A", "Languages": "N/A",
-                "Original_Language": "N/A", "Popularity": 0, "Vote_Average": 0,
-                "Vote_Count": 0, "Adult": False, "Homepage": "N/A", "IMDB_ID": "N/A",
-                "Created_By": "N/A", "Keywords": "N/A", "Cast": "N/A", "Crew": "N/A"
-            }
-            enriched_row.update(tmdb_fields)
-            enriched_data.append(enriched_row)
             failed_shows.append(title)
             logging.warning(f"✗ Failed to enrich: {title}")
-        
-        # Rate limiting - TMDB allows 40 requests per 10 seconds
-        time.sleep(0.25)  # 4 requests per second to be safe
-        
-        # Save progress every 50 shows
-        if (int(index) + 1) % 50 == 0:
-            temp_df = pd.DataFrame(enriched_data)
-            temp_df.to_csv("data/enriched_shows_progress.csv", index=False)
-            logging.info(f"Progress saved: {len(enriched_data)} shows processed")
     
     # Save final results
     if enriched_data:
@@ -198,8 +458,11 @@ def enrich_watched_shows():
         # Save to CSV
         enriched_df.to_csv("data/enriched_watched_shows.csv", index=False)
         
+        # Save a typed, columnar copy for faster downstream loads
+        saved_parquet = save_parquet(enriched_df, "data/enriched_watched_shows.parquet")
+        
         # Save to JSON for easier reading
-        enriched_df.to_json("data/enriched_watched_shows.json", orient="records", indent=2)
+        save_json(enriched_df, "data/enriched_watched_shows.json")
         
         logging.info(f"Successfully enriched {len(enriched_data)} shows!")
         logging.info(f"Successfully matched with TMDB: {len(enriched_data) - len(failed_shows)}")
@@ -222,20 +485,19 @@ def enrich_watched_shows():
             logging.info(f"Average number of episodes: {matched_shows['Number_of_Episodes'].mean():.1f}")
             
             # Top genres
-            all_genres = []
-            for genres_str in matched_shows["Genres"]:
-                if genres_str != "N/A":
-                    all_genres.extend([g.strip() for g in genres_str.split(",")])
+            all_genres = matched_shows.loc[matched_shows["Genres"] != "N/A", "Genres"]
+            all_genres = all_genres.str.split(",").explode().str.strip()
+            top_genres = all_genres[all_genres != ""].value_counts().head(10)
             
-            if all_genres:
-                from collections import Counter
-                top_genres = Counter(all_genres).most_common(10)
+            if not top_genres.empty:
                 logging.info("Top genres in your watched shows:")
-                for genre, count in top_genres:
+                for genre, count in top_genres.items():
                     logging.info(f"  {genre}: {count} shows")
         
         logging.info("Results saved to:")
         logging.info("- data/enriched_watched_shows.csv")
+        if saved_parquet:
+            logging.info("- data/enriched_watched_shows.parquet")
         logging.info("- data/enriched_watched_shows.json")
     
     else:
@@ -263,10 +525,10 @@ def enrich_reviews():
     unique_shows = reviews_df["Title"].unique()
     show_tmdb_cache = {}
     
+    tmdb_results = asyncio.run(enrich_shows([(title, None) for title in unique_shows]))
+    
     for i, title in enumerate(unique_shows):
-        logging.info(f"Processing show {i + 1}/{len(unique_shows)}: {title}")
-        
-        tmdb_data = enrich_show_data(title)
+        tmdb_data = tmdb_results[i]
         if tmdb_data:
             show_tmdb_cache[title] = tmdb_data
             logging.info(f"✓ Cached TMDB data for: {title}")
@@ -274,24 +536,16 @@ def enrich_reviews():
             show_tmdb_cache[title] = None
             failed_reviews.append(title)
             logging.warning(f"✗ Failed to get TMDB data for: {title}")
-        
-        time.sleep(0.25)  # Rate limiting
     
     # Now enrich all reviews using the cache
-    for index, row in reviews_df.iterrows():
-        title = row["Title"]
-        enriched_row = row.to_dict()
+    for enriched_row in reviews_df.to_dict("records"):
+        title = enriched_row["Title"]
         
         if show_tmdb_cache.get(title):
             enriched_row.update(show_tmdb_cache[title])
         else:
             # Add empty TMDB fields
-            tmdb_fields = {
-                "TMDB_ID": "N/A", "TMDB_Title": "N/A", "Genres": "N/A",
-                "Vote_Average": 0, "Popularity": 0, "Number_of_Seasons": 0,
-                "Number_of_Episodes": 0, "Status": "N/A", "Networks": "N/A"
-            }
-            enriched_row.update(tmdb_fields)
+            enriched_row.update(EMPTY_REVIEW_TMDB_FIELDS)
         
         enriched_reviews.append(enriched_row)
     
@@ -299,14 +553,22 @@ def enrich_reviews():
     if enriched_reviews:
         enriched_reviews_df = pd.DataFrame(enriched_reviews)
         enriched_reviews_df.to_csv("data/enriched_reviews.csv", index=False)
-        enriched_reviews_df.to_json("data/enriched_reviews.json", orient="records", indent=2)
+        saved_parquet = save_parquet(enriched_reviews_df, "data/enriched_reviews.parquet")
+        save_json(enriched_reviews_df, "data/enriched_reviews.json")
         
         logging.info(f"Successfully enriched {len(enriched_reviews)} reviews!")
         logging.info("Results saved to:")
         logging.info("- data/enriched_reviews.csv")
+        if saved_parquet:
+            logging.info("- data/enriched_reviews.parquet")
         logging.info("- data/enriched_reviews.json")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich watched shows and reviews with TMDB data")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached TMDB responses and fetch again")
+    args = parser.parse_args()
+    REFRESH = args.refresh
+    
     logging.info("Starting TMDB enrichment process...")
     
     # Enrich watched shows
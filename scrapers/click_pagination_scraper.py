@@ -1,16 +1,17 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 import csv
-import time
 import logging
 from dotenv import load_dotenv
 import os
+import sys
 import json
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
+from core import EXTRACT_SHOWS_JS, build_driver, card_title, login
 
 load_dotenv()
 EMAIL = os.getenv("SERIALIZD_EMAIL")
@@ -20,45 +21,39 @@ USERNAME = os.getenv("SERIALIZD_USERNAME")
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up Chrome options
-options = Options()
-# options.add_argument("--headless")  # Uncomment for headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
-
-try:
-    logging.info("Navigating to login page")
-    driver.get("https://serializd.com/login")
+# Fail before starting a browser if the login details are missing
+missing = [name for name, value in [("SERIALIZD_EMAIL", EMAIL), ("SERIALIZD_PASSWORD", PASSWORD),
+                                    ("SERIALIZD_USERNAME", USERNAME)] if not value]
+if missing:
+    logging.error(f"Missing {', '.join(missing)} in environment variables! Add them to your .env file")
+    sys.exit(1)
 
-    # Wait for login form
-    wait = WebDriverWait(driver, 20)
-    logging.info("Locating email and password fields")
+CARD_SELECTOR = ".show-card-v2-container"
 
-    # Find email and password fields
-    email_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']")))
-    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-    email_field.send_keys(EMAIL)
-    password_field.send_keys(PASSWORD)
+def wait_for_page_change(wait, old_card, old_html):
+    """Wait until the first show card is replaced or re-rendered with different content"""
+    def changed(driver):
+        try:
+            return old_card.get_attribute("innerHTML") != old_html
+        except StaleElementReferenceException:
+            return True
+    
+    try:
+        wait.until(changed)
+    except TimeoutException:
+        logging.warning("Show cards did not change after clicking the next page")
 
-    # Find login button
-    logging.info("Clicking login button")
-    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-    login_button.click()
+driver = build_driver()
 
-    # Wait for redirect
-    logging.info("Waiting for login redirect")
-    time.sleep(5)
+try:
+    wait = login(driver, EMAIL, PASSWORD)
 
-    # Navigate to shows page
+    # Navigate to shows page (the page loop waits for the show cards)
     shows_url = f"https://serializd.com/user/{USERNAME}/shows"
     logging.info(f"Navigating to {shows_url}")
     driver.get(shows_url)
-    time.sleep(5)
 
-    watched_shows = []
-    seen_titles = set()
+    watched_shows = {}  # Title -> show record, in the order first seen
     page_num = 1
     
     while page_num <= 21:  # Maximum 21 pages as you mentioned
@@ -66,13 +61,13 @@ try:
         
         # Wait for show elements to load
         try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".show-card-v2-container")))
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR)))
         except:
             logging.warning(f"No show cards found on page {page_num}")
             break
 
         # Get all show elements on current page
-        show_elements = driver.find_elements(By.CSS_SELECTOR, ".show-card-v2-container")
+        show_elements = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
         logging.info(f"Found {len(show_elements)} show elements on page {page_num}")
 
         if not show_elements:
@@ -81,65 +76,27 @@ try:
 
         # Extract show information from current page
         page_shows_added = 0
-        for i, show in enumerate(show_elements):
+        show_cards = driver.execute_script(EXTRACT_SHOWS_JS, CARD_SELECTOR)
+        for i, show in enumerate(show_cards):
             try:
-                title = "Unknown"
-                
-                # Try multiple ways to get the title
-                title_selectors = ["h3", "h2", "h1", ".title", "[class*='title']", "img"]
-                for title_sel in title_selectors:
-                    try:
-                        if title_sel == "img":
-                            # Get from alt attribute
-                            img_element = show.find_element(By.CSS_SELECTOR, "img")
-                            alt_text = img_element.get_attribute("alt")
-                            if alt_text and alt_text != "":
-                                title = alt_text.replace("Poster for ", "").replace("poster", "").strip()
-                                break
-                        else:
-                            title_element = show.find_element(By.CSS_SELECTOR, title_sel)
-                            title_text = title_element.text.strip()
-                            if title_text and title_text != "":
-                                title = title_text
-                                break
-                    except:
-                        continue
+                title = card_title(show)
 
-                if title == "Unknown" or title == "" or title == "undefined":
+                if not title or title == "Unknown" or title == "undefined":
                     continue
 
                 # Skip duplicates
-                if title in seen_titles:
+                if title in watched_shows:
                     continue
-                seen_titles.add(title)
 
-                # Try to get rating
-                rating = "N/A"
-                rating_selectors = [
-                    "[class*='rating']", 
-                    ".rating", 
-                    "[class*='score']", 
-                    ".score",
-                    "[class*='star']",
-                    ".star"
-                ]
-                for rating_sel in rating_selectors:
-                    try:
-                        rating_element = show.find_element(By.CSS_SELECTOR, rating_sel)
-                        rating_text = rating_element.text.strip()
-                        if rating_text and rating_text != "":
-                            rating = rating_text
-                            break
-                    except:
-                        continue
+                rating = show["rating"] or "N/A"
 
-                watched_shows.append({
+                watched_shows[title] = {
                     "Title": title,
                     "Status": "Watched",
                     "Rating": rating,
                     "Seasons": "N/A",
                     "Page": page_num
-                })
+                }
                 page_shows_added += 1
 
             except Exception as e:
@@ -153,11 +110,14 @@ try:
             with open("progress_watched_shows.csv", "w", newline="", encoding="utf-8") as f:
                 writer = csv.DictWriter(f, fieldnames=["Title", "Status", "Rating", "Seasons", "Page"])
                 writer.writeheader()
-                writer.writerows(watched_shows)
+                writer.writerows(watched_shows.values())
             logging.info(f"Progress saved: {len(watched_shows)} shows so far")
 
-        # Try to find and click the next page button
+        # Try to find and click the next page button, remembering the current first card
+        # so we can tell when the next page has rendered
         next_found = False
+        old_card = show_elements[0]
+        old_html = old_card.get_attribute("innerHTML")
         
         # Look for pagination buttons
         try:
@@ -173,7 +133,7 @@ try:
                         logging.info(f"Found next page button for page {next_page_num}")
                         driver.execute_script("arguments[0].click();", item)
                         next_found = True
-                        time.sleep(3)  # Wait for page to load
+                        wait_for_page_change(wait, old_card, old_html)  # Wait for page to load
                         break
                 except Exception as e:
                     continue
@@ -194,7 +154,7 @@ try:
                             logging.info(f"Found next button with selector: {next_sel}")
                             driver.execute_script("arguments[0].click();", next_button)
                             next_found = True
-                            time.sleep(3)
+                            wait_for_page_change(wait, old_card, old_html)
                             break
                     except:
                         continue
@@ -210,6 +170,8 @@ try:
 
     # Final save
     if watched_shows:
+        watched_shows = list(watched_shows.values())
+        
         # Save to CSV
         logging.info("Saving final results to CSV")
         with open("final_watched_shows.csv", "w", newline="", encoding="utf-8") as f:
@@ -218,8 +180,12 @@ try:
             writer.writerows(watched_shows)
 
         # Also save to JSON for easier reading
-        with open("final_watched_shows.json", "w", encoding="utf-8") as f:
-            json.dump(watched_shows, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open("final_watched_shows.json", "wb") as f:
+                f.write(orjson.dumps(watched_shows, option=orjson.OPT_INDENT_2))
+        else:
+            with open("final_watched_shows.json", "w", encoding="utf-8") as f:
+                json.dump(watched_shows, f, indent=2, ensure_ascii=False)
 
         logging.info(f"Successfully scraped {len(watched_shows)} watched shows from {page_num-1} pages!")
         logging.info("Results saved to:")
@@ -0,0 +1,204 @@
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+import csv
+import logging
+import os
+import json
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
+
+LOGIN_URL = "https://serializd.com/login"
+# Success-path screenshots are slow on long pages; set SCRAPER_DEBUG=1 to save them
+DEBUG = os.getenv("SCRAPER_DEBUG") == "1"
+# Record the JSON responses behind the rendered pages, to find the API the cards are built from
+CAPTURE_XHR = os.getenv("SCRAPER_CAPTURE_XHR") == "1"
+# Run Chrome without a window; set SCRAPER_HEADLESS=1 once logging in works for your account
+HEADLESS = os.getenv("SCRAPER_HEADLESS") == "1"
+
+# Pull title, poster alt text, rating, season line, link and class list out of every element
+# matching arguments[0] in one browser round-trip. Each text field takes the first matching
+# element with visible text; the link is the <a> wrapping the card, or else one inside it.
+EXTRACT_SHOWS_JS = """
+return Array.from(document.querySelectorAll(arguments[0])).map(card => {
+    const firstText = selectors => {
+        for (const selector of selectors) {
+            const element = card.querySelector(selector);
+            const text = element ? element.innerText.trim() : '';
+            if (text) return text;
+        }
+        return null;
+    };
+    const img = card.querySelector('img');
+    const link = card.closest('a[href]') || card.querySelector('a[href]');
+    return {
+        title: firstText(['h3', 'h2', 'h1', '.title', "[class*='title']"]),
+        alt: img ? img.getAttribute('alt') : null,
+        rating: firstText([
+            "[class*='rating']", '.rating', "[class*='score']", '.score', "[class*='star']", '.star'
+        ]),
+        season: firstText(['.small-text']),
+        link: link ? link.href : null,
+        classes: card.className
+    };
+});
+"""
+
+# Scroll to the bottom on every animation frame until no new elements matching arguments[0] have
+# been added for arguments[1] ms, then call back with the element count. A MutationObserver
+# restarts the quiet window as soon as new cards arrive instead of sleeping blindly.
+SCROLL_UNTIL_STABLE_JS = """
+const [selector, quietMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+let lastCount = count();
+let lastChange = performance.now();
+const observer = new MutationObserver(() => {
+    const n = count();
+    if (n !== lastCount) {
+        lastCount = n;
+        lastChange = performance.now();
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+const step = now => {
+    window.scrollTo(0, document.body.scrollHeight);
+    if (now - lastChange >= quietMs) {
+        observer.disconnect();
+        done(lastCount);
+    } else {
+        requestAnimationFrame(step);
+    }
+};
+requestAnimationFrame(step);
+"""
+SCROLL_QUIET_MS = 3000
+SCROLL_TIMEOUT = 600  # seconds; the scroll script returns only once the list stops growing
+
+def build_driver():
+    """Start Chrome on the shared profile with poster images, GPU and extensions switched off"""
+    options = Options()
+    if HEADLESS:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    # Return from driver.get once the DOM is parsed; every caller waits explicitly for its cards
+    options.page_load_strategy = "eager"
+    # Skip downloading posters; titles only need the img alt attribute, which is still in the DOM
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # Keep cookies between runs so a saved Serializd session can skip the login form
+    profile_dir = os.path.abspath(os.getenv("CHROME_PROFILE_DIR", ".chrome-profile"))
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    # A pinned CHROMEDRIVER_PATH avoids webdriver-manager's version check on every launch
+    service = Service(os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install())
+    if CAPTURE_XHR:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return webdriver.Chrome(service=service, options=options)
+
+def login(driver, email, password):
+    """Log in through the form unless the profile is still signed in, and return the page's WebDriverWait"""
+    logging.info("Navigating to login page")
+    driver.get(LOGIN_URL)
+
+    # Wait for the login form, or a redirect away from it if the profile is still logged in
+    wait = WebDriverWait(driver, 20)
+    wait.until(lambda d: "/login" not in d.current_url
+               or d.find_elements(By.CSS_SELECTOR, "input[type='email']"))
+
+    if "/login" not in driver.current_url:
+        logging.info("Already logged in from the saved Chrome profile")
+        return wait
+
+    logging.info("Locating email and password fields")
+
+    # Find email and password fields
+    email_field = driver.find_element(By.CSS_SELECTOR, "input[type='email']")
+    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
+    email_field.send_keys(email)
+    password_field.send_keys(password)
+
+    # Find login button
+    logging.info("Clicking login button")
+    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
+    login_button.click()
+
+    # Wait for redirect
+    logging.info("Waiting for login redirect")
+    wait.until(EC.url_changes(LOGIN_URL))
+    return wait
+
+def json_responses(driver):
+    """JSON responses received by the current tab since the last call, as (url, body) pairs"""
+    responses = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message["method"] != "Network.responseReceived":
+            continue
+        response = message["params"]["response"]
+        if "json" not in response.get("mimeType", ""):
+            continue
+        request_id = message["params"]["requestId"]
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception as e:
+            logging.warning(f"Could not read the response body for {response['url']}: {e}")
+            continue
+        responses.append((response["url"], body["body"]))
+    return responses
+
+def card_title(card):
+    """Title of an EXTRACT_SHOWS_JS record: heading text first, then the poster's alt attribute"""
+    if card["title"]:
+        return card["title"]
+    if card["alt"]:
+        return card["alt"].replace("Poster for ", "").replace("poster", "").strip()
+    return "Unknown"
+
+def save_parquet(shows, path):
+    """Save scraped shows as zstd-compressed Parquet when pyarrow is installed"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logging.warning(f"pyarrow is not installed, skipping {path}")
+        return False
+    
+    try:
+        pq.write_table(pa.Table.from_pylist(shows), path, compression="zstd")
+        return True
+    except Exception as e:
+        logging.error(f"Error saving {path}: {e}")
+    return False
+
+def save_shows(shows, csv_path, json_path, fieldnames, parquet_path=None):
+    """Write shows to CSV and indented JSON, and to Parquet if parquet_path is set; True if it was"""
+    logging.info("Saving watched shows to CSV")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(shows)
+
+    # Also save to JSON for easier reading
+    if orjson is not None:
+        with open(json_path, "wb") as f:
+            f.write(orjson.dumps(shows, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(shows, f, indent=2, ensure_ascii=False)
+
+    return bool(parquet_path) and save_parquet(shows, parquet_path)
+
+def save_error_artifacts(driver, screenshot_path, source_path):
+    """Save a screenshot and the page source after a failed run"""
+    driver.save_screenshot(screenshot_path)
+    with open(source_path, "w", encoding="utf-8") as f:
+        f.write(driver.page_source)
+    logging.info("Error screenshot and page source saved for debugging")
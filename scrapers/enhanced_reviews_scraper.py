@@ -1,17 +1,19 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import csv
+import shutil
 import time
 import logging
 from dotenv import load_dotenv
 import os
 import json
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
 import re
+from core import DEBUG, build_driver, login
 
 load_dotenv()
 EMAIL = os.getenv("SERIALIZD_EMAIL")
@@ -21,36 +23,114 @@ USERNAME = os.getenv("SERIALIZD_USERNAME")
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up Chrome options
-options = Options()
-# options.add_argument("--headless")  # Uncomment for headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
-
-try:
-    logging.info("Navigating to login page")
-    driver.get("https://serializd.com/login")
+# Selector cascades, tried in order; built once rather than per review element
+REVIEW_SELECTORS = (
+    ".review-card", ".review-item", ".review", "[class*='review']",
+    ".card", "[class*='card']", "article", ".post", "[class*='post']"
+)
+REVIEW_INDICATORS = ("season", "episode", "rating", "review", "watched")
+REVIEW_LINK_SELECTOR = "a[href*='/review/']"
+PROGRESS_PATH = "data/progress_reviews.csv"
+PROGRESS_TMP_PATH = PROGRESS_PATH + ".tmp"
+TITLE_SELECTORS = (
+    "h1", "h2", "h3", "h4",
+    ".title", "[class*='title']",
+    ".show-title", "[class*='show']",
+    "img[alt]"
+)
+SEASON_SELECTORS = (
+    ".season", "[class*='season']",
+    ".episode", "[class*='episode']",
+    ".small-text", ".meta", "[class*='meta']"
+)
+RATING_SELECTORS = (
+    "[class*='rating']", ".rating",
+    "[class*='score']", ".score",
+    "[class*='star']", ".star",
+    "[class*='grade']", ".grade"
+)
+REVIEW_CONTENT_SELECTORS = (
+    ".review-text", "[class*='review-text']",
+    ".review-content", "[class*='review-content']",
+    ".content", "[class*='content']",
+    ".text", "[class*='text']",
+    "p"
+)
+DATE_SELECTORS = (
+    ".date", "[class*='date']",
+    ".time", "[class*='time']",
+    ".timestamp", "[class*='timestamp']",
+    "time"
+)
+PAGINATION_SELECTORS = (
+    ".pagination-next", ".next",
+    "[aria-label*='Next']", "[aria-label*='next']",
+    ".pagination-item:last-child",
+    "a[href*='page=']"
+)
+REVIEW_FIELDS = ["Title", "Season_Episode", "Rating", "Review_Text", "Watch_Date", "Review_ID", "Page"]
+RATING_STRIP = str.maketrans("", "", "./")
+LETTER_GRADES = frozenset({"A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "F"})
+YEAR_RE = re.compile(r'\d{4}')
+MD_RE = re.compile(r'\d{1,2}/\d{1,2}')
+FIELD_SELECTORS = {
+    "title": TITLE_SELECTORS,
+    "season": SEASON_SELECTORS,
+    "rating": RATING_SELECTORS,
+    "text": REVIEW_CONTENT_SELECTORS,
+    "date": DATE_SELECTORS
+}
 
-    # Wait for login form
-    wait = WebDriverWait(driver, 20)
-    logging.info("Locating email and password fields")
+# Pick the first container selector whose elements mention a review indicator, then read every field
+# cascade for each container in one round trip. innerText keeps the rendered line breaks and skips
+# script, style and hidden text, so the indicator filter and line clean-up only see what is on screen.
+EXTRACT_REVIEWS_JS = """
+const [containerSelectors, indicators, linkSelector, fields] = arguments;
+let selector = null;
+let containers = [];
+for (const candidate of containerSelectors) {
+    containers = Array.from(document.querySelectorAll(candidate)).filter(element => {
+        const text = (element.innerText || '').toLowerCase();  // SVG elements have no innerText
+        return indicators.some(indicator => text.includes(indicator));
+    });
+    if (containers.length) {
+        selector = candidate;
+        break;
+    }
+}
+if (!containers.length) {
+    containers = Array.from(document.querySelectorAll(linkSelector));
+    selector = containers.length ? linkSelector : null;
+}
+return {
+    selector: selector,
+    reviews: containers.map(container => {
+        const link = selector === linkSelector ? container : container.querySelector(linkSelector);
+        const review = {href: link ? link.getAttribute('href') : null};
+        for (const [name, selectors] of Object.entries(fields)) {
+            review[name] = selectors.map(fieldSelector => {
+                const element = container.querySelector(fieldSelector);
+                if (!element) return null;
+                return element.tagName === 'IMG' ? element.getAttribute('alt') : element.innerText || null;
+            });
+        }
+        return review;
+    })
+};
+"""
 
-    # Find email and password fields
-    email_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']")))
-    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-    email_field.send_keys(EMAIL)
-    password_field.send_keys(PASSWORD)
+def clean_text(text):
+    """Rendered text with whitespace collapsed within lines and blank lines dropped"""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
 
-    # Find login button
-    logging.info("Clicking login button")
-    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-    login_button.click()
+driver = build_driver()
+# Missing selectors should fail instantly; anything that has to wait uses an explicit WebDriverWait
+driver.implicitly_wait(0)
 
-    # Wait for redirect
-    logging.info("Waiting for login redirect")
-    time.sleep(5)
+try:
+    login(driver, EMAIL, PASSWORD)
+    wait = WebDriverWait(driver, 20, poll_frequency=0.1)
 
     # Navigate to reviews page
     reviews_url = f"https://serializd.com/user/{USERNAME}/reviews"
@@ -59,274 +139,187 @@ try:
     time.sleep(5)
 
     # Take screenshot for debugging
-    driver.save_screenshot("debug_output/reviews_page_debug.png")
-    logging.info("Saved reviews page screenshot")
+    if DEBUG:
+        driver.save_screenshot("debug_output/reviews_page_debug.png")
+        logging.info("Saved reviews page screenshot")
 
     reviews_data = []
     seen_reviews = set()
     page_num = 1
     
-    while True:  # Continue until no more reviews
-        logging.info(f"Processing reviews page {page_num}")
+    # Append rows as they are scraped instead of rewriting the file every page. They go to a
+    # temporary file that only replaces the last good progress file once the scrape finds reviews
+    with open(PROGRESS_TMP_PATH, "w", newline="", encoding="utf-8") as progress_file:
+        progress_writer = csv.DictWriter(progress_file, fieldnames=REVIEW_FIELDS)
+        progress_writer.writeheader()
         
-        # Wait for review elements to load
-        try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div, article, section")))
-            time.sleep(3)  # Additional wait for dynamic content
-        except:
-            logging.warning(f"No review elements found on page {page_num}")
-            break
-
-        # Try multiple selectors for review containers
-        review_selectors = [
-            ".review-card",
-            ".review-item", 
-            ".review",
-            "[class*='review']",
-            ".card",
-            "[class*='card']",
-            "article",
-            ".post",
-            "[class*='post']"
-        ]
-        
-        review_elements = []
-        working_selector = None
+        while True:  # Continue until no more reviews
+            logging.info(f"Processing reviews page {page_num}")
         
-        for selector in review_selectors:
+            # Wait for review elements to load
             try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    # Filter elements that likely contain reviews
-                    potential_reviews = []
-                    for elem in elements:
-                        elem_text = elem.text.lower()
-                        # Look for review indicators
-                        if any(indicator in elem_text for indicator in ['season', 'episode', 'rating', 'review', 'watched']):
-                            potential_reviews.append(elem)
-                    
-                    if potential_reviews:
-                        review_elements = potential_reviews
-                        working_selector = selector
-                        logging.info(f"Found {len(review_elements)} potential review elements with selector: {selector}")
-                        break
-            except:
-                continue
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div, article, section")))
+                time.sleep(3)  # Additional wait for dynamic content
+            except Exception:
+                logging.warning(f"No review elements found on page {page_num}")
+                break
 
-        if not review_elements:
-            logging.warning(f"No review elements found on page {page_num}")
-            # Try to find any links that might contain reviews
-            review_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/review/']")
-            if review_links:
-                logging.info(f"Found {len(review_links)} review links instead")
-                review_elements = review_links
-                working_selector = "a[href*='/review/']"
-            else:
+            # Read the review containers and their fields in the browser in a single call,
+            # rather than asking for every element and field over WebDriver
+            page = driver.execute_script(
+                EXTRACT_REVIEWS_JS, REVIEW_SELECTORS, REVIEW_INDICATORS, REVIEW_LINK_SELECTOR, FIELD_SELECTORS
+            )
+            working_selector = page["selector"]
+            review_elements = page["reviews"]
+
+            if working_selector is None:
+                logging.warning(f"No review elements found on page {page_num}")
                 break
+            if working_selector == REVIEW_LINK_SELECTOR:
+                logging.warning(f"No review elements found on page {page_num}")
+                logging.info(f"Found {len(review_elements)} review links instead")
+            else:
+                logging.info(f"Found {len(review_elements)} potential review elements "
+                             f"with selector: {working_selector}")
 
-        # Extract review information from current page
-        page_reviews_added = 0
-        for i, review_elem in enumerate(review_elements):
-            try:
-                # Get review ID to avoid duplicates
-                review_id = None
+            # Extract review information from current page
+            page_reviews_added = 0
+            for i, review_elem in enumerate(review_elements):
                 try:
-                    if working_selector == "a[href*='/review/']":
-                        review_url = review_elem.get_attribute("href")
-                        review_id = review_url.split("/review/")[-1] if review_url and "/review/" in review_url else None
-                    else:
-                        # Look for review links within the element
-                        review_link = review_elem.find_element(By.CSS_SELECTOR, "a[href*='/review/']")
-                        review_url = review_link.get_attribute("href")
-                        review_id = review_url.split("/review/")[-1] if review_url and "/review/" in review_url else None
-                except:
-                    review_id = f"page_{page_num}_item_{i}"  # Fallback ID
+                    # Get review ID to avoid duplicates
+                    review_url = review_elem["href"]
+                    review_id = None
+                    if review_url and "/review/" in review_url:
+                        review_id = review_url.split("/review/")[-1]
+                    elif review_url is None and working_selector != REVIEW_LINK_SELECTOR:
+                        review_id = f"page_{page_num}_item_{i}"  # Fallback ID
 
-                if review_id in seen_reviews:
-                    continue
-                seen_reviews.add(review_id)
+                    if review_id in seen_reviews:
+                        continue
+                    seen_reviews.add(review_id)
 
-                # Extract show title
-                title = "Unknown"
-                title_selectors = [
-                    "h1", "h2", "h3", "h4",
-                    ".title", "[class*='title']",
-                    ".show-title", "[class*='show']",
-                    "img[alt]"
-                ]
-                
-                for title_sel in title_selectors:
-                    try:
+                    # Extract show title
+                    title = "Unknown"
+                    for title_sel, title_text in zip(TITLE_SELECTORS, review_elem["title"]):
+                        if title_text is None:
+                            continue
                         if "img" in title_sel:
-                            img_elem = review_elem.find_element(By.CSS_SELECTOR, title_sel)
-                            alt_text = img_elem.get_attribute("alt")
-                            if alt_text and "poster" in alt_text.lower():
-                                title = alt_text.replace("Poster for ", "").replace("poster", "").strip()
+                            if title_text and "poster" in title_text.lower():
+                                title = title_text.replace("Poster for ", "").replace("poster", "").strip()
                                 break
                         else:
-                            title_elem = review_elem.find_element(By.CSS_SELECTOR, title_sel)
-                            title_text = title_elem.text.strip()
+                            title_text = clean_text(title_text)
                             if title_text and len(title_text) > 2:
                                 title = title_text
                                 break
-                    except:
-                        continue
 
-                # Extract season/episode info
-                season_episode = "N/A"
-                season_selectors = [
-                    ".season", "[class*='season']",
-                    ".episode", "[class*='episode']",
-                    ".small-text", ".meta", "[class*='meta']"
-                ]
-                
-                for season_sel in season_selectors:
-                    try:
-                        season_elem = review_elem.find_element(By.CSS_SELECTOR, season_sel)
-                        season_text = season_elem.text.strip()
-                        if season_text and ("season" in season_text.lower() or "episode" in season_text.lower()):
+                    # Extract season/episode info
+                    season_episode = "N/A"
+                    for season_text in review_elem["season"]:
+                        season_text = clean_text(season_text) if season_text else ""
+                        lowered = season_text.lower()
+                        if season_text and ("season" in lowered or "episode" in lowered):
                             season_episode = season_text
                             break
-                    except:
-                        continue
 
-                # Extract rating
-                rating = "N/A"
-                rating_selectors = [
-                    "[class*='rating']", ".rating",
-                    "[class*='score']", ".score", 
-                    "[class*='star']", ".star",
-                    "[class*='grade']", ".grade"
-                ]
-                
-                for rating_sel in rating_selectors:
-                    try:
-                        rating_elem = review_elem.find_element(By.CSS_SELECTOR, rating_sel)
-                        rating_text = rating_elem.text.strip()
+                    # Extract rating
+                    rating = "N/A"
+                    for rating_text in review_elem["rating"]:
+                        rating_text = clean_text(rating_text) if rating_text else ""
                         # Look for numeric ratings or letter grades
-                        if rating_text and (rating_text.replace(".", "").replace("/", "").replace("10", "").isdigit() or 
-                                          rating_text in ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "F"]):
+                        if rating_text and (rating_text.translate(RATING_STRIP).replace("10", "").isdigit() or
+                                            rating_text in LETTER_GRADES):
                             rating = rating_text
                             break
-                    except:
-                        continue
 
-                # Extract review text
-                review_text = "N/A"
-                review_selectors = [
-                    ".review-text", "[class*='review-text']",
-                    ".review-content", "[class*='review-content']",
-                    ".content", "[class*='content']",
-                    ".text", "[class*='text']",
-                    "p"
-                ]
-                
-                for review_sel in review_selectors:
-                    try:
-                        review_elem_text = review_elem.find_element(By.CSS_SELECTOR, review_sel)
-                        review_content = review_elem_text.text.strip()
+                    # Extract review text
+                    review_text = "N/A"
+                    for review_content in review_elem["text"]:
+                        review_content = clean_text(review_content) if review_content else ""
                         if review_content and len(review_content) > 10:  # Ensure it's substantial text
                             review_text = review_content
                             break
-                    except:
-                        continue
 
-                # Extract watch date if available
-                watch_date = "N/A"
-                date_selectors = [
-                    ".date", "[class*='date']",
-                    ".time", "[class*='time']",
-                    ".timestamp", "[class*='timestamp']",
-                    "time"
-                ]
-                
-                for date_sel in date_selectors:
-                    try:
-                        date_elem = review_elem.find_element(By.CSS_SELECTOR, date_sel)
-                        date_text = date_elem.text.strip()
+                    # Extract watch date if available
+                    watch_date = "N/A"
+                    for date_text in review_elem["date"]:
+                        date_text = clean_text(date_text) if date_text else ""
                         # Look for date patterns
-                        if date_text and (re.search(r'\d{4}', date_text) or re.search(r'\d{1,2}/\d{1,2}', date_text)):
+                        if date_text and (YEAR_RE.search(date_text) or MD_RE.search(date_text)):
                             watch_date = date_text
                             break
-                    except:
-                        continue
 
-                if title != "Unknown":
-                    reviews_data.append({
-                        "Title": title,
-                        "Season_Episode": season_episode,
-                        "Rating": rating,
-                        "Review_Text": review_text,
-                        "Watch_Date": watch_date,
-                        "Review_ID": review_id,
-                        "Page": page_num
-                    })
-                    page_reviews_added += 1
+                    if title != "Unknown":
+                        review = {
+                            "Title": title,
+                            "Season_Episode": season_episode,
+                            "Rating": rating,
+                            "Review_Text": review_text,
+                            "Watch_Date": watch_date,
+                            "Review_ID": review_id,
+                            "Page": page_num
+                        }
+                        reviews_data.append(review)
+                        progress_writer.writerow(review)
+                        page_reviews_added += 1
 
-            except Exception as e:
-                logging.error(f"Error scraping review {i+1} on page {page_num}: {e}")
-                continue
+                except Exception as e:
+                    logging.error(f"Error scraping review {i+1} on page {page_num}: {e}")
+                    continue
 
-        logging.info(f"Added {page_reviews_added} new reviews from page {page_num}. Total: {len(reviews_data)}")
+            logging.info(f"Added {page_reviews_added} new reviews from page {page_num}. "
+                         f"Total: {len(reviews_data)}")
         
-        # Save progress after each page
-        if reviews_data:
-            with open("data/progress_reviews.csv", "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=["Title", "Season_Episode", "Rating", "Review_Text", "Watch_Date", "Review_ID", "Page"])
-                writer.writeheader()
-                writer.writerows(reviews_data)
-            logging.info(f"Progress saved: {len(reviews_data)} reviews so far")
+            # Save progress after each page
+            if page_reviews_added:
+                progress_file.flush()
+                logging.info(f"Progress saved: {len(reviews_data)} reviews so far")
 
-        # Try to find and click the next page button
-        next_found = False
+            # Try to find and click the next page button
+            next_found = False
         
-        try:
-            # Look for pagination
-            pagination_selectors = [
-                ".pagination-next", ".next",
-                "[aria-label*='Next']", "[aria-label*='next']",
-                ".pagination-item:last-child",
-                "a[href*='page=']"
-            ]
-            
-            for next_sel in pagination_selectors:
-                try:
-                    next_button = driver.find_element(By.CSS_SELECTOR, next_sel)
-                    if next_button.is_enabled() and next_button.is_displayed():
-                        logging.info(f"Found next button with selector: {next_sel}")
-                        driver.execute_script("arguments[0].click();", next_button)
-                        next_found = True
-                        time.sleep(3)
-                        break
-                except:
-                    continue
+            try:
+                # Look for pagination
+                for next_sel in PAGINATION_SELECTORS:
+                    try:
+                        next_button = driver.find_element(By.CSS_SELECTOR, next_sel)
+                        if next_button.is_enabled() and next_button.is_displayed():
+                            logging.info(f"Found next button with selector: {next_sel}")
+                            driver.execute_script("arguments[0].click();", next_button)
+                            next_found = True
+                            time.sleep(3)
+                            break
+                    except Exception:
+                        continue
                     
-        except Exception as e:
-            logging.error(f"Error finding pagination: {e}")
+            except Exception as e:
+                logging.error(f"Error finding pagination: {e}")
 
-        if not next_found:
-            logging.info(f"No next page button found after page {page_num}, stopping")
-            break
+            if not next_found:
+                logging.info(f"No next page button found after page {page_num}, stopping")
+                break
             
-        page_num += 1
+            page_num += 1
         
-        # Safety limit
-        if page_num > 50:  # Reasonable limit for reviews
-            logging.info("Reached page limit of 50, stopping")
-            break
+            # Safety limit
+            if page_num > 50:  # Reasonable limit for reviews
+                logging.info("Reached page limit of 50, stopping")
+                break
 
     # Final save
     if reviews_data:
-        # Save to CSV
+        # The progress file already holds every review in order, so copy it rather than re-encode the rows
         logging.info("Saving final reviews to CSV")
-        with open("data/serializd_reviews.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["Title", "Season_Episode", "Rating", "Review_Text", "Watch_Date", "Review_ID", "Page"])
-            writer.writeheader()
-            writer.writerows(reviews_data)
+        os.replace(PROGRESS_TMP_PATH, PROGRESS_PATH)
+        shutil.copyfile(PROGRESS_PATH, "data/serializd_reviews.csv")
 
         # Also save to JSON
-        with open("data/serializd_reviews.json", "w", encoding="utf-8") as f:
-            json.dump(reviews_data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open("data/serializd_reviews.json", "wb") as f:
+                f.write(orjson.dumps(reviews_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open("data/serializd_reviews.json", "w", encoding="utf-8") as f:
+                json.dump(reviews_data, f, indent=2, ensure_ascii=False)
 
         logging.info(f"Successfully scraped {len(reviews_data)} reviews from {page_num-1} pages!")
         logging.info("Results saved to:")
@@ -344,11 +337,14 @@ try:
         for i, review in enumerate(reviews_data[:5]):
             logging.info(f"{i+1}. {review['Title']} - Rating: {review['Rating']}")
             if review['Review_Text'] != 'N/A':
-                preview_text = review['Review_Text'][:100] + "..." if len(review['Review_Text']) > 100 else review['Review_Text']
+                preview_text = review['Review_Text']
+                if len(preview_text) > 100:
+                    preview_text = preview_text[:100] + "..."
                 logging.info(f"   Review: {preview_text}")
             
     else:
         logging.error("No reviews were scraped!")
+        os.remove(PROGRESS_TMP_PATH)
         # Save page source for debugging
         with open("debug_output/reviews_page_source.html", "w", encoding="utf-8") as f:
             f.write(driver.page_source)
@@ -365,5 +361,5 @@ finally:
     logging.info("Closing browser")
     try:
         driver.quit()
-    except:
+    except Exception:
         pass
@@ -1,17 +1,18 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException
 import csv
-import time
 import logging
 from dotenv import load_dotenv
 import os
 import json
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
+from core import (DEBUG, EXTRACT_SHOWS_JS, SCROLL_QUIET_MS, SCROLL_TIMEOUT, SCROLL_UNTIL_STABLE_JS,
+                  build_driver, card_title, login)
 
 load_dotenv()
 EMAIL = os.getenv("SERIALIZD_EMAIL")
@@ -21,63 +22,44 @@ USERNAME = os.getenv("SERIALIZD_USERNAME")
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up Chrome options
-options = Options()
-# options.add_argument("--headless")  # Uncomment for headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
-
-try:
-    logging.info("Navigating to login page")
-    driver.get("https://serializd.com/login")
-
-    # Wait for login form
-    wait = WebDriverWait(driver, 20)
-    logging.info("Locating email and password fields")
+# Card selectors, tried in order until one matches
+SHOW_SELECTORS = (
+    ".show-card-v2-container",
+    ".show-card",
+    "[class*='show-card']",
+    ".card",
+    "[class*='card']"
+)
 
-    # Find email and password fields
-    email_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']")))
-    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-    email_field.send_keys(EMAIL)
-    password_field.send_keys(PASSWORD)
+driver = build_driver()
+# Missing selectors should fail instantly; anything that has to wait uses an explicit WebDriverWait
+driver.implicitly_wait(0)
 
-    # Find login button
-    logging.info("Clicking login button")
-    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-    login_button.click()
-
-    # Wait for redirect
-    logging.info("Waiting for login redirect")
-    time.sleep(5)
+try:
+    wait = login(driver, EMAIL, PASSWORD)
 
     # Navigate to shows page (where all watched shows are)
     watched_url = f"https://serializd.com/user/{USERNAME}/shows"
     logging.info(f"Navigating to {watched_url}")
     driver.get(watched_url)
 
-    # Wait for page to load
-    time.sleep(5)
+    # Wait for the first card of any kind to render
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(SHOW_SELECTORS))))
+    except TimeoutException:
+        logging.warning("No show cards appeared on the shows page")
 
     # Take a screenshot for debugging
-    driver.save_screenshot("debug_output/final_debug.png")
-    logging.info("Saved screenshot as debug_output/final_debug.png")
+    if DEBUG:
+        driver.save_screenshot("debug_output/final_debug.png")
+        logging.info("Saved screenshot as debug_output/final_debug.png")
 
     watched_shows = []
     seen_titles = set()
 
     # Find the working selector
-    selectors_to_try = [
-        ".show-card-v2-container",
-        ".show-card",
-        "[class*='show-card']",
-        ".card",
-        "[class*='card']"
-    ]
-
     working_selector = None
-    for selector in selectors_to_try:
+    for selector in SHOW_SELECTORS:
         try:
             show_elements = driver.find_elements(By.CSS_SELECTOR, selector)
             if show_elements:
@@ -95,77 +77,28 @@ try:
     else:
         # Aggressive scrolling approach
         logging.info("Starting aggressive scrolling to load all shows")
+        driver.set_script_timeout(SCROLL_TIMEOUT)
+        show_count = driver.execute_async_script(SCROLL_UNTIL_STABLE_JS, working_selector, SCROLL_QUIET_MS)
         
-        # Method 1: Scroll multiple times with longer waits
-        for scroll_round in range(20):  # Try 20 rounds of scrolling
-            logging.info(f"Scroll round {scroll_round + 1}/20")
-            
-            # Get current count
-            current_shows = driver.find_elements(By.CSS_SELECTOR, working_selector)
-            before_count = len(current_shows)
+        for scroll_round in range(20):  # Try up to 20 rounds of keyboard scrolling
+            logging.info(f"Scrolling settled at {show_count} shows, trying keyboard scrolling")
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.PAGE_DOWN * 20)
+            new_count = driver.execute_async_script(SCROLL_UNTIL_STABLE_JS, working_selector, SCROLL_QUIET_MS)
             
-            # Multiple scroll actions
-            for i in range(10):  # 10 scroll actions per round
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(0.5)
-                
-            # Wait for content to load
-            time.sleep(3)
-            
-            # Check if new content loaded
-            new_shows = driver.find_elements(By.CSS_SELECTOR, working_selector)
-            after_count = len(new_shows)
-            
-            logging.info(f"Round {scroll_round + 1}: {before_count} -> {after_count} shows")
-            
-            # If no new content for 3 consecutive rounds, try different approach
-            if after_count == before_count:
-                logging.info("No new content loaded, trying keyboard scrolling")
-                # Try keyboard scrolling
-                body = driver.find_element(By.TAG_NAME, "body")
-                for j in range(20):
-                    body.send_keys(Keys.PAGE_DOWN)
-                    time.sleep(0.2)
-                time.sleep(2)
-                
-                # Check again
-                final_shows = driver.find_elements(By.CSS_SELECTOR, working_selector)
-                final_count = len(final_shows)
-                
-                if final_count == after_count:
-                    logging.info(f"Still no new content after keyboard scrolling. Stopping at {final_count} shows.")
-                    break
-                else:
-                    logging.info(f"Keyboard scrolling worked: {after_count} -> {final_count} shows")
+            if new_count == show_count:
+                logging.info(f"No new content after keyboard scrolling. Stopping at {show_count} shows.")
+                break
+            logging.info(f"Keyboard scrolling worked: {show_count} -> {new_count} shows")
+            show_count = new_count
 
-        # Final count
-        show_elements = driver.find_elements(By.CSS_SELECTOR, working_selector)
-        logging.info(f"Final count: Found {len(show_elements)} show elements")
+        # Final count, reading every show card in a single script call
+        show_cards = driver.execute_script(EXTRACT_SHOWS_JS, working_selector)
+        logging.info(f"Final count: Found {len(show_cards)} show elements")
 
         # Extract all the shows
-        for i, show in enumerate(show_elements):
+        for i, show in enumerate(show_cards):
             try:
-                title = "Unknown"
-                
-                # Try multiple ways to get the title
-                title_selectors = ["h3", "h2", "h1", ".title", "[class*='title']", "img"]
-                for title_sel in title_selectors:
-                    try:
-                        if title_sel == "img":
-                            # Get from alt attribute
-                            img_element = show.find_element(By.CSS_SELECTOR, "img")
-                            alt_text = img_element.get_attribute("alt")
-                            if alt_text and alt_text != "":
-                                title = alt_text.replace("Poster for ", "").replace("poster", "").strip()
-                                break
-                        else:
-                            title_element = show.find_element(By.CSS_SELECTOR, title_sel)
-                            title_text = title_element.text.strip()
-                            if title_text and title_text != "":
-                                title = title_text
-                                break
-                    except:
-                        continue
+                title = card_title(show)
 
                 if title == "Unknown" or title == "" or title == "undefined":
                     continue
@@ -175,25 +108,7 @@ try:
                     continue
                 seen_titles.add(title)
 
-                # Try to get rating
-                rating = "N/A"
-                rating_selectors = [
-                    "[class*='rating']", 
-                    ".rating", 
-                    "[class*='score']", 
-                    ".score",
-                    "[class*='star']",
-                    ".star"
-                ]
-                for rating_sel in rating_selectors:
-                    try:
-                        rating_element = show.find_element(By.CSS_SELECTOR, rating_sel)
-                        rating_text = rating_element.text.strip()
-                        if rating_text and rating_text != "":
-                            rating = rating_text
-                            break
-                    except:
-                        continue
+                rating = show["rating"] or "N/A"
 
                 watched_shows.append({
                     "Title": title,
@@ -219,8 +134,12 @@ try:
             writer.writerows(watched_shows)
 
         # Also save to JSON for easier reading
-        with open("data/final_watched_shows.json", "w", encoding="utf-8") as f:
-            json.dump(watched_shows, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open("data/final_watched_shows.json", "wb") as f:
+                f.write(orjson.dumps(watched_shows, option=orjson.OPT_INDENT_2))
+        else:
+            with open("data/final_watched_shows.json", "w", encoding="utf-8") as f:
+                json.dump(watched_shows, f, indent=2, ensure_ascii=False)
 
         logging.info(f"Successfully scraped {len(watched_shows)} watched shows!")
         logging.info("Results saved to:")
@@ -1,16 +1,13 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import csv
-import time
+from selenium.common.exceptions import TimeoutException
 import logging
 from dotenv import load_dotenv
 import os
 import json
+from core import (CAPTURE_XHR, DEBUG, EXTRACT_SHOWS_JS, SCROLL_QUIET_MS, SCROLL_TIMEOUT,
+                  SCROLL_UNTIL_STABLE_JS, build_driver, card_title, json_responses, login,
+                  save_error_artifacts, save_shows)
 
 load_dotenv()
 EMAIL = os.getenv("SERIALIZD_EMAIL")
@@ -20,48 +17,26 @@ USERNAME = os.getenv("SERIALIZD_USERNAME")
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up Chrome options
-options = Options()
-# options.add_argument("--headless")  # Uncomment for headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
+driver = build_driver()
 
 try:
-    logging.info("Navigating to login page")
-    driver.get("https://serializd.com/login")
-
-    # Wait for login form
-    wait = WebDriverWait(driver, 20)
-    logging.info("Locating email and password fields")
-
-    # Find email and password fields
-    email_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']")))
-    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-    email_field.send_keys(EMAIL)
-    password_field.send_keys(PASSWORD)
-
-    # Find login button
-    logging.info("Clicking login button")
-    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-    login_button.click()
-
-    # Wait for redirect
-    logging.info("Waiting for login redirect")
-    time.sleep(5)
+    wait = login(driver, EMAIL, PASSWORD)
 
     # Navigate to shows page (where all watched shows are)
     watched_url = f"https://serializd.com/user/{USERNAME}/shows"
     logging.info(f"Navigating to {watched_url}")
     driver.get(watched_url)
 
-    # Wait for page to load
-    time.sleep(3)
+    # Wait for the first card to render; every selector tried below has 'card' or 'poster' in its class
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[class*='card'], [class*='poster']")))
+    except TimeoutException:
+        logging.warning("No show cards appeared on the shows page")
 
     # Take a screenshot for debugging
-    driver.save_screenshot("debug_output/watched_page.png")
-    logging.info("Saved screenshot as debug_output/watched_page.png")
+    if DEBUG:
+        driver.save_screenshot("debug_output/watched_page.png")
+        logging.info("Saved screenshot as debug_output/watched_page.png")
 
     # Try different approaches to find shows
     watched_shows = []
@@ -101,56 +76,24 @@ try:
     else:
         # Method 2: Infinite scroll to load all shows
         logging.info("Scrolling to load all shows")
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
-        max_scroll_attempts = 50  # Prevent infinite scrolling
-
-        while scroll_attempts < max_scroll_attempts:
-            # Scroll down to bottom
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            
-            # Wait for new content to load
-            time.sleep(2)
-            
-            # Calculate new scroll height and compare with last scroll height
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                logging.info(f"No more content to load after {scroll_attempts} scroll attempts")
-                break
-            last_height = new_height
-            scroll_attempts += 1
-            
-            # Check how many shows we have now
-            current_shows = driver.find_elements(By.CSS_SELECTOR, working_selector)
-            logging.info(f"After scroll {scroll_attempts}: Found {len(current_shows)} shows")
-
-        # Now extract all the shows
-        show_elements = driver.find_elements(By.CSS_SELECTOR, working_selector)
-        logging.info(f"Final count: Found {len(show_elements)} show elements")
-
-        for i, show in enumerate(show_elements):
+        # Stop once the card count, not the page height, has been stable for SCROLL_QUIET_MS
+        driver.set_script_timeout(SCROLL_TIMEOUT)
+        show_count = driver.execute_async_script(SCROLL_UNTIL_STABLE_JS, working_selector, SCROLL_QUIET_MS)
+        logging.info(f"No more content to load after scrolling: {show_count} shows")
+
+        if CAPTURE_XHR:
+            responses = [{"url": url, "body": body} for url, body in json_responses(driver)]
+            with open("debug_output/shows_xhr_responses.json", "w", encoding="utf-8") as f:
+                json.dump(responses, f, indent=2, ensure_ascii=False)
+            logging.info(f"Saved {len(responses)} JSON responses to debug_output/shows_xhr_responses.json")
+
+        # Now extract all the shows, reading every card in a single script call
+        show_cards = driver.execute_script(EXTRACT_SHOWS_JS, working_selector)
+        logging.info(f"Final count: Found {len(show_cards)} show elements")
+
+        for i, show in enumerate(show_cards):
             try:
-                title = "Unknown"
-                
-                # Try multiple ways to get the title
-                title_selectors = ["h3", "h2", "h1", ".title", "[class*='title']", "img"]
-                for title_sel in title_selectors:
-                    try:
-                        if title_sel == "img":
-                            # Get from alt attribute
-                            img_element = show.find_element(By.CSS_SELECTOR, "img")
-                            alt_text = img_element.get_attribute("alt")
-                            if alt_text and alt_text != "":
-                                title = alt_text.replace("Poster for ", "").replace("poster", "").strip()
-                                break
-                        else:
-                            title_element = show.find_element(By.CSS_SELECTOR, title_sel)
-                            title_text = title_element.text.strip()
-                            if title_text and title_text != "":
-                                title = title_text
-                                break
-                    except:
-                        continue
+                title = card_title(show)
 
                 if title == "Unknown" or title == "":
                     logging.warning(f"Could not extract title for show {i+1}")
@@ -161,25 +104,7 @@ try:
                     continue
                 seen_titles.add(title)
 
-                # Try to get rating
-                rating = "N/A"
-                rating_selectors = [
-                    "[class*='rating']", 
-                    ".rating", 
-                    "[class*='score']", 
-                    ".score",
-                    "[class*='star']",
-                    ".star"
-                ]
-                for rating_sel in rating_selectors:
-                    try:
-                        rating_element = show.find_element(By.CSS_SELECTOR, rating_sel)
-                        rating_text = rating_element.text.strip()
-                        if rating_text and rating_text != "":
-                            rating = rating_text
-                            break
-                    except:
-                        continue
+                rating = show["rating"] or "N/A"
 
                 watched_shows.append({
                     "Title": title,
@@ -197,21 +122,17 @@ try:
 
     # Save results
     if watched_shows:
-        # Save to CSV
-        logging.info("Saving watched shows to CSV")
-        with open("data/improved_watched_shows.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["Title", "Status", "Rating", "Seasons"])
-            writer.writeheader()
-            writer.writerows(watched_shows)
-
-        # Also save to JSON for easier reading
-        with open("data/improved_watched_shows.json", "w", encoding="utf-8") as f:
-            json.dump(watched_shows, f, indent=2, ensure_ascii=False)
+        saved_parquet = save_shows(watched_shows, "data/improved_watched_shows.csv",
+                                   "data/improved_watched_shows.json",
+                                   ["Title", "Status", "Rating", "Seasons"],
+                                   parquet_path="data/improved_watched_shows.parquet")
 
         logging.info(f"Successfully scraped {len(watched_shows)} watched shows!")
         logging.info("Results saved to:")
         logging.info("- data/improved_watched_shows.csv")
         logging.info("- data/improved_watched_shows.json")
+        if saved_parquet:
+            logging.info("- data/improved_watched_shows.parquet")
         
         # Print first few shows as preview
         logging.info("First 10 shows:")
@@ -223,10 +144,7 @@ try:
 
 except Exception as e:
     logging.error(f"An error occurred: {e}")
-    driver.save_screenshot("debug_output/error_screenshot.png")
-    with open("debug_output/error_page_source.html", "w", encoding="utf-8") as f:
-        f.write(driver.page_source)
-    logging.info("Error screenshot and page source saved for debugging")
+    save_error_artifacts(driver, "debug_output/error_screenshot.png", "debug_output/error_page_source.html")
 
 finally:
     logging.info("Closing browser")
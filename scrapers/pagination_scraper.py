@@ -1,16 +1,9 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import csv
-import time
 import logging
 from dotenv import load_dotenv
 import os
-import json
+from core import DEBUG, EXTRACT_SHOWS_JS, build_driver, card_title, login, save_error_artifacts, save_shows
 
 load_dotenv()
 EMAIL = os.getenv("SERIALIZD_EMAIL")
@@ -20,54 +13,42 @@ USERNAME = os.getenv("SERIALIZD_USERNAME")
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up Chrome options
-options = Options()
-# options.add_argument("--headless")  # Uncomment for headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
+LAST_PAGE = 21
+PAGE_TABS = 4  # pages loading side by side in tabs of the logged-in browser
 
-try:
-    logging.info("Navigating to login page")
-    driver.get("https://serializd.com/login")
-
-    # Wait for login form
-    wait = WebDriverWait(driver, 20)
-    logging.info("Locating email and password fields")
-
-    # Find email and password fields
-    email_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']")))
-    password_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-    email_field.send_keys(EMAIL)
-    password_field.send_keys(PASSWORD)
+def page_url(page_num):
+    """URL of one page of the user's shows list"""
+    if page_num == 1:
+        return f"https://serializd.com/user/{USERNAME}/shows"
+    return f"https://serializd.com/user/{USERNAME}/shows?page={page_num}"
 
-    # Find login button
-    logging.info("Clicking login button")
-    login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-    login_button.click()
+driver = build_driver()
 
-    # Wait for redirect
-    logging.info("Waiting for login redirect")
-    time.sleep(5)
+try:
+    wait = login(driver, EMAIL, PASSWORD)
 
     watched_shows = []
     seen_titles = set()
     page_num = 0  # Initialize page_num
+    main_window = driver.current_window_handle
+    page_tabs = {}
     
     # Loop through all 21 pages
-    for page_num in range(1, 22):  # Pages 1 to 21
-        # Navigate to specific page
-        if page_num == 1:
-            page_url = f"https://serializd.com/user/{USERNAME}/shows"
-        else:
-            page_url = f"https://serializd.com/user/{USERNAME}/shows?page={page_num}"
+    for page_num in range(1, LAST_PAGE + 1):
+        # Open the next few pages in new tabs so they load while this one is scraped;
+        # the tabs share the session cookies from the login above
+        for ahead in range(page_num, min(page_num + PAGE_TABS, LAST_PAGE + 1)):
+            if ahead not in page_tabs:
+                before = set(driver.window_handles)
+                driver.execute_script("window.open(arguments[0], '_blank');", page_url(ahead))
+                page_tabs[ahead] = (set(driver.window_handles) - before).pop()
         
-        logging.info(f"Navigating to page {page_num}: {page_url}")
-        driver.get(page_url)
+        # Done with the previous page's tab
+        if driver.current_window_handle != main_window:
+            driver.close()
         
-        # Wait for page to load
-        time.sleep(3)
+        logging.info(f"Navigating to page {page_num}: {page_url(page_num)}")
+        driver.switch_to.window(page_tabs.pop(page_num))
         
         # Wait for show elements to load
         try:
@@ -86,29 +67,10 @@ try:
 
         # Extract show information from current page
         page_shows_added = 0
-        for i, show in enumerate(show_elements):
+        show_cards = driver.execute_script(EXTRACT_SHOWS_JS, ".show-card-v2-container")
+        for i, show in enumerate(show_cards):
             try:
-                title = "Unknown"
-                
-                # Try multiple ways to get the title
-                title_selectors = ["h3", "h2", "h1", ".title", "[class*='title']", "img"]
-                for title_sel in title_selectors:
-                    try:
-                        if title_sel == "img":
-                            # Get from alt attribute
-                            img_element = show.find_element(By.CSS_SELECTOR, "img")
-                            alt_text = img_element.get_attribute("alt")
-                            if alt_text and alt_text != "":
-                                title = alt_text.replace("Poster for ", "").replace("poster", "").strip()
-                                break
-                        else:
-                            title_element = show.find_element(By.CSS_SELECTOR, title_sel)
-                            title_text = title_element.text.strip()
-                            if title_text and title_text != "":
-                                title = title_text
-                                break
-                    except:
-                        continue
+                title = card_title(show)
 
                 if title == "Unknown" or title == "" or title == "undefined":
                     continue
@@ -118,25 +80,7 @@ try:
                     continue
                 seen_titles.add(title)
 
-                # Try to get rating
-                rating = "N/A"
-                rating_selectors = [
-                    "[class*='rating']", 
-                    ".rating", 
-                    "[class*='score']", 
-                    ".score",
-                    "[class*='star']",
-                    ".star"
-                ]
-                for rating_sel in rating_selectors:
-                    try:
-                        rating_element = show.find_element(By.CSS_SELECTOR, rating_sel)
-                        rating_text = rating_element.text.strip()
-                        if rating_text and rating_text != "":
-                            rating = rating_text
-                            break
-                    except:
-                        continue
+                rating = show["rating"] or "N/A"
 
                 watched_shows.append({
                     "Title": title,
@@ -154,27 +98,22 @@ try:
         logging.info(f"Added {page_shows_added} new shows from page {page_num}. Total: {len(watched_shows)}")
         
         # Take a screenshot of the first and last pages for debugging
-        if page_num == 1 or page_num == 21:
+        if DEBUG and (page_num == 1 or page_num == LAST_PAGE):
             driver.save_screenshot(f"debug_output/page_{page_num}_debug.png")
             logging.info(f"Saved screenshot for page {page_num}")
 
     # Save results
     if watched_shows:
-        # Save to CSV
-        logging.info("Saving watched shows to CSV")
-        with open("data/all_watched_shows.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["Title", "Status", "Rating", "Seasons", "Page"])
-            writer.writeheader()
-            writer.writerows(watched_shows)
-
-        # Also save to JSON for easier reading
-        with open("data/all_watched_shows.json", "w", encoding="utf-8") as f:
-            json.dump(watched_shows, f, indent=2, ensure_ascii=False)
+        saved_parquet = save_shows(watched_shows, "data/all_watched_shows.csv", "data/all_watched_shows.json",
+                                   ["Title", "Status", "Rating", "Seasons", "Page"],
+                                   parquet_path="data/all_watched_shows.parquet")
 
         logging.info(f"Successfully scraped {len(watched_shows)} watched shows from {page_num} pages!")
         logging.info("Results saved to:")
         logging.info("- data/all_watched_shows.csv")
         logging.info("- data/all_watched_shows.json")
+        if saved_parquet:
+            logging.info("- data/all_watched_shows.parquet")
         
         # Print statistics
         logging.info(f"Total shows scraped: {len(watched_shows)}")
@@ -197,10 +136,8 @@ try:
 
 except Exception as e:
     logging.error(f"An error occurred: {e}")
-    driver.save_screenshot("debug_output/pagination_error_screenshot.png")
-    with open("debug_output/pagination_error_page_source.html", "w", encoding="utf-8") as f:
-        f.write(driver.page_source)
-    logging.info("Error screenshot and page source saved for debugging")
+    save_error_artifacts(driver, "debug_output/pagination_error_screenshot.png",
+                         "debug_output/pagination_error_page_source.html")
 
 finally:
     logging.info("Closing browser")
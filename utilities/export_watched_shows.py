@@ -1,5 +1,10 @@
 import json
 import logging
+import os
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the standard library encoder
+    orjson = None
 # from serializd import SerializdClient # Commented out as 'serializd' package was deleted
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -23,7 +28,14 @@ def export_watched_shows(email: str, password: str, username: str, output_file:
 
     # Set up Chrome options
     options = Options()
-    # options.add_argument("--headless")  # Uncomment for headless mode
+    if os.getenv("SCRAPER_HEADLESS") == "1":
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    # Titles come from the card headings, so skip downloading the posters
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # Return from driver.get once the DOM is parsed; the cards are waited for explicitly below
+    options.page_load_strategy = "eager"
     driver = webdriver.Chrome(options=options)
 
     try:
@@ -66,8 +78,12 @@ def export_watched_shows(email: str, password: str, username: str, output_file:
 
         # Save watched shows to JSON
         logging.info("Saving watched shows to JSON")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(watched_shows, f, indent=4)
+        if orjson is not None:
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(watched_shows, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(watched_shows, f, indent=2, ensure_ascii=False)
 
         logging.info(f"Scraped {len(watched_shows)} watched shows and saved to {output_file}")
 
@@ -7,8 +7,11 @@ Runs the entire analysis from scraping to recommendations
 import os
 import sys
 import logging
+import runpy
+import signal
 import subprocess
 import time
+from importlib.metadata import PackageNotFoundError, distribution
 from pathlib import Path
 
 # Set up logging
@@ -21,27 +24,31 @@ logging.basicConfig(
     ]
 )
 
+SCRIPT_TIMEOUT = 3600  # seconds per step
+
 def check_dependencies():
     """Check if all required dependencies are installed"""
-    # Map package names to their import names
-    package_imports = {
-        'pandas': 'pandas',
-        'numpy': 'numpy', 
-        'scikit-learn': 'sklearn',
-        'matplotlib': 'matplotlib',
-        'seaborn': 'seaborn',
-        'requests': 'requests',
-        'python-dotenv': 'dotenv',
-        'selenium': 'selenium',
-        'webdriver-manager': 'webdriver_manager',
-        'textblob': 'textblob'
-    }
+    # Look packages up by their installed metadata instead of importing them; importing
+    # sklearn and matplotlib alone takes seconds before any step has started
+    package_names = [
+        'pandas',
+        'numpy',
+        'scikit-learn',
+        'matplotlib',
+        'seaborn',
+        'requests',
+        'aiohttp',
+        'python-dotenv',
+        'selenium',
+        'webdriver-manager',
+        'textblob'
+    ]
     
     missing_packages = []
-    for package_name, import_name in package_imports.items():
+    for package_name in package_names:
         try:
-            __import__(import_name)
-        except ImportError:
+            distribution(package_name)
+        except PackageNotFoundError:
             missing_packages.append(package_name)
     
     if missing_packages:
@@ -85,6 +92,15 @@ def check_env_file():
     logging.info("Environment configuration looks good")
     return True
 
+# A BaseException, so the scripts' own `except Exception` handlers cannot swallow it. A bare
+# `except:` still would, so the scripts run in-process must not use one.
+class StepTimeout(BaseException):
+    """Raised inside a running step once it overruns SCRIPT_TIMEOUT"""
+
+def raise_step_timeout(signum, frame):
+    """SIGALRM handler that stops the current step"""
+    raise StepTimeout
+
 def run_script(script_name, description, required=True):
     """Run a Python script and handle errors"""
     script_path = Path(script_name)
@@ -100,24 +116,44 @@ def run_script(script_name, description, required=True):
     logging.info(f"Starting: {description}")
     logging.info(f"Running: {script_name}")
     
+    # Without SIGALRM (Windows) an in-process step could not be timed out, so run it in its own
+    # interpreter there, as before
+    if not hasattr(signal, "SIGALRM"):
+        return run_script_subprocess(script_name, description, required)
+    
+    # Run the script in this interpreter instead of a new one, so Python startup and the
+    # pandas/sklearn imports are paid once per pipeline rather than once per step
+    saved_argv, saved_path = sys.argv, sys.path[:]
+    sys.argv = [script_name]
+    sys.path.insert(0, str(script_path.resolve().parent))  # the scripts import their sibling modules
+    signal.signal(signal.SIGALRM, raise_step_timeout)
+    signal.alarm(SCRIPT_TIMEOUT)
+    
     try:
-        # Run the script
-        result = subprocess.run([sys.executable, script_name], 
-                              capture_output=True, text=True, timeout=3600)  # 1 hour timeout
+        try:
+            runpy.run_path(script_name, run_name="__main__")
+            succeeded = True
+        except SystemExit as e:
+            succeeded = e.code in (None, 0)
+        except Exception as e:
+            logging.error(f"Error: {e}")
+            succeeded = False
         
-        if result.returncode == 0:
-            logging.info(f"✅ Successfully completed: {description}")
-            if result.stdout:
-                logging.info(f"Output: {result.stdout[-500:]}")  # Last 500 chars
-            return True
-        else:
-            logging.error(f"❌ Failed: {description}")
-            logging.error(f"Error: {result.stderr}")
-            if not required:
-                logging.info("Continuing with pipeline as this step is optional")
-                return True
-            return False
+        return report_step(succeeded, description, required)
             
+    except StepTimeout:
+        logging.error(f"❌ Timeout: {description} took too long")
+        return False
+    finally:
+        signal.alarm(0)
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+def run_script_subprocess(script_name, description, required=True):
+    """Run a Python script in a child interpreter, killing it after SCRIPT_TIMEOUT"""
+    try:
+        result = subprocess.run([sys.executable, script_name], timeout=SCRIPT_TIMEOUT)
+        return report_step(result.returncode == 0, description, required)
     except subprocess.TimeoutExpired:
         logging.error(f"❌ Timeout: {description} took too long")
         return False
@@ -125,6 +161,18 @@ def run_script(script_name, description, required=True):
         logging.error(f"❌ Error running {script_name}: {e}")
         return False
 
+def report_step(succeeded, description, required):
+    """Log a finished step and return whether the pipeline may continue"""
+    if succeeded:
+        logging.info(f"✅ Successfully completed: {description}")
+        return True
+    
+    logging.error(f"❌ Failed: {description}")
+    if not required:
+        logging.info("Continuing with pipeline as this step is optional")
+        return True
+    return False
+
 def check_existing_data():
     """Check what data files already exist"""
     files_to_check = {
@@ -179,7 +227,9 @@ def main():
     # Ask user what to do
     if existing_count > 0:
         print(f"\nFound {existing_count} existing data files.")
-        choice = input("Do you want to (r)un full pipeline, (s)kip existing steps, or (q)uit? [r/s/q]: ").lower().strip()
+        choice = input(
+            "Do you want to (r)un full pipeline, (s)kip existing steps, or (q)uit? [r/s/q]: "
+        ).lower().strip()
         
         if choice == 'q':
             logging.info("User chose to quit")